@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图后端基准
+在 Xvfb 下按多种分辨率比较 mss 与 XShm 后端的整屏截图速度 (grabs/sec)。
+
+用法:
+    python benchmarks/bench_capture.py
+    python benchmarks/bench_capture.py --resolutions 1920x1080,3840x2160 --seconds 5
+    python benchmarks/bench_capture.py --no-xvfb          # 使用当前 DISPLAY，不启动 Xvfb
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backends import create_backend
+from core.screen import Screen
+
+
+def start_xvfb(display_number, width, height):
+    """启动一个指定分辨率的 Xvfb，返回进程对象。"""
+    proc = subprocess.Popen(
+        ["Xvfb", f":{display_number}", "-screen", "0", f"{width}x{height}x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    socket = f"/tmp/.X11-unix/X{display_number}"
+    deadline = time.time() + 10
+    while not os.path.exists(socket):
+        if proc.poll() is not None or time.time() > deadline:
+            proc.kill()
+            raise RuntimeError(f"Xvfb :{display_number} 启动失败")
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{display_number}"
+    return proc
+
+
+def measure(backend_name, seconds, color):
+    """返回 (grabs/sec, 每次耗时 ms)；后端不可用时返回 None。"""
+    try:
+        screen = Screen(backend=create_backend(backend_name), reuse_buffers=True)
+    except Exception as e:
+        print(f"  [{backend_name}] 不可用: {e}")
+        return None
+    try:
+        screen.capture(color=color)  # 预热: 分配缓冲区 / 共享内存段
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            screen.capture(color=color)
+            count += 1
+        elapsed = time.perf_counter() - start
+        return count / elapsed, elapsed * 1000 / count
+    finally:
+        screen.backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图后端基准 (mss vs XShm)")
+    parser.add_argument("--resolutions", default="1280x720,1920x1080,2560x1440,3840x2160")
+    parser.add_argument("--backends", default="mss,xshm")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每项测试的时长")
+    parser.add_argument("--display-number", type=int, default=99, help="Xvfb 使用的显示编号")
+    parser.add_argument("--no-xvfb", action="store_true", help="不启动 Xvfb，直接测试当前 DISPLAY")
+    parser.add_argument("--raw", action="store_true", help="只截图不做 BGR 转换")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if args.no_xvfb:
+        resolutions = [None]
+    else:
+        if shutil.which("Xvfb") is None:
+            parser.error("未找到 Xvfb，请安装 xvfb 或使用 --no-xvfb")
+        resolutions = [tuple(int(v) for v in r.lower().split("x")) for r in args.resolutions.split(",")]
+
+    rows = []
+    for resolution in resolutions:
+        proc = start_xvfb(args.display_number, *resolution) if resolution else None
+        label = f"{resolution[0]}x{resolution[1]}" if resolution else os.environ.get("DISPLAY", "?")
+        try:
+            for name in backends:
+                result = measure(name, args.seconds, color=not args.raw)
+                if result:
+                    rows.append((label, name) + result)
+        finally:
+            if proc:
+                proc.terminate()
+                proc.wait(timeout=5)
+
+    print("\n=== 截图后端基准 ===")
+    print(f"{'分辨率':<12}{'后端':<8}{'grabs/sec':>12}{'ms/grab':>10}")
+    for label, name, rate, ms in rows:
+        print(f"{label:<12}{name:<8}{rate:>12.1f}{ms:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行模板匹配基准
+在合成的 1080p / 4K 画面上比较不同 match_threads 下的匹配速度:
+- 整屏单模板 (画面按行分块并行)
+- 多模板 find_any (prioritized=False，每个模板一个任务)
+
+用法:
+    python benchmarks/bench_parallel.py
+    python benchmarks/bench_parallel.py --threads 1,2,4,8 --resolutions 1920x1080
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backends import ReplayBackend
+from core.screen import Screen
+from core.vision import Vision
+from benchmarks.bench_vision import synthesize
+
+
+def extra_templates(template, count, workdir):
+    """从模板派生若干个画面中不存在的模板 (find_any 需要全部匹配完才返回)。"""
+    image = cv2.imread(template, cv2.IMREAD_COLOR)
+    paths = [template]
+    for i in range(count):
+        path = os.path.join(workdir, f"decoy_{i}.png")
+        cv2.imwrite(path, np.roll(image, (i + 1) * 17, axis=1) ^ np.uint8((i + 1) * 37 % 256))
+        paths.append(path)
+    return paths
+
+
+def timed(fn, seconds):
+    """返回每次调用的平均耗时 (毫秒)，至少执行一次。"""
+    count = 0
+    start = time.perf_counter()
+    while count == 0 or time.perf_counter() - start < seconds:
+        fn()
+        count += 1
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行模板匹配基准 (回放后端)")
+    default_threads = sorted({1, 2, 4, os.cpu_count() or 1})
+    parser.add_argument("--threads", default=",".join(str(t) for t in default_threads), help="测试的线程数列表")
+    parser.add_argument("--resolutions", default="1920x1080,3840x2160", help="合成画面的分辨率列表")
+    parser.add_argument("--templates", type=int, default=4, help="find_any 测试使用的模板数")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每项测试的时长")
+    args = parser.parse_args()
+
+    threads = [int(t) for t in args.threads.split(",")]
+    cv2.setNumThreads(1) # 只测量 Vision 线程池带来的并行，排除 OpenCV 内部线程的干扰
+    print(f"\n=== 并行匹配基准 (CPU 核心数: {os.cpu_count()}) ===")
+    for resolution in args.resolutions.split(","):
+        size = tuple(int(v) for v in resolution.lower().split("x"))
+        workdir = tempfile.mkdtemp(prefix="dorobot_bench_")
+        source, template, _region = synthesize(size, 2, workdir)
+        templates = extra_templates(template, args.templates - 1, workdir)
+        screen = Screen(backend=ReplayBackend(source, pacing="fast"), reuse_buffers=True)
+        # 复用同一帧，只测量匹配 (关闭匹配结果记忆，否则第二次起都是记忆命中)
+        vision = Vision(screen, frame_cache_ttl=60.0, memo_entries=0)
+        vision.find_template(template) # 预先截图并加载模板
+
+        print(f"\n{resolution}:")
+        print(f"  {'线程数':<8}{'整屏单模板':>16}{'加速比':>8}{'多模板 find_any':>20}{'加速比':>8}")
+        baseline = None
+        for count in threads:
+            vision.set_match_threads(count)
+            single = timed(lambda: vision.find_template(template), args.seconds)
+            multi = timed(lambda: vision.find_any(templates, prioritized=False), args.seconds)
+            baseline = baseline or (single, multi)
+            print(f"  {count:<8}{single:>13.1f} ms{baseline[0] / single:>7.2f}x"
+                  f"{multi:>17.1f} ms{baseline[1] / multi:>7.2f}x")
+        vision.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vision 吞吐基准
+使用回放后端 (fast 节奏) 在无桌面环境下确定性地测量截图与模板匹配速度。
+
+用法:
+    python benchmarks/bench_vision.py                              # 合成 1080p 画面
+    python benchmarks/bench_vision.py --resolution 3840x2160
+    python benchmarks/bench_vision.py --source recordings/arena.mp4 --template templates/victory.png
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.backends import ReplayBackend
+from core.screen import Screen
+from core.vision import Vision
+
+
+def synthesize(resolution, frames, workdir):
+    """生成带有一个固定按钮的合成画面，返回 (.npy 路径, 模板路径, 按钮区域)。"""
+    width, height = resolution
+    rng = np.random.default_rng(0)
+    stack = np.empty((frames, height, width, 3), dtype=np.uint8)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    button = rng.integers(0, 255, (80, 200, 3), dtype=np.uint8)
+    bx, by = width - 260, height - 140
+    for i in range(frames):
+        stack[i] = np.roll(base, i * 7, axis=1)
+        stack[i, by:by + 80, bx:bx + 200] = button
+    source = os.path.join(workdir, "frames.npy")
+    template = os.path.join(workdir, "button.png")
+    np.save(source, stack)
+    cv2.imwrite(template, button)
+    return source, template, (bx - 40, by - 40, 280, 160)
+
+
+def measure(label, fn, seconds):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {count / elapsed:8.1f} 次/秒  ({elapsed * 1000 / count:7.2f} ms/次)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision 吞吐基准 (回放后端)")
+    parser.add_argument("--source", help="PNG 目录、.npy 或视频文件；缺省时合成画面")
+    parser.add_argument("--template", help="要匹配的模板 (使用 --source 时必填)")
+    parser.add_argument("--region", help="区域匹配测试使用的区域 left,top,width,height")
+    parser.add_argument("--resolution", default="1920x1080", help="合成画面的分辨率")
+    parser.add_argument("--frames", type=int, default=8, help="合成画面的帧数")
+    parser.add_argument("--pyramid-levels", type=int, default=2, help="金字塔匹配测试使用的缩小层数")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每项测试的时长")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dorobot_bench_")
+    if args.source:
+        if not args.template:
+            parser.error("使用 --source 时必须指定 --template")
+        source, template = args.source, args.template
+        region = tuple(int(v) for v in args.region.split(",")) if args.region else None
+    else:
+        resolution = tuple(int(v) for v in args.resolution.lower().split("x"))
+        source, template, region = synthesize(resolution, args.frames, workdir)
+
+    screen = Screen(backend=ReplayBackend(source, pacing="fast"), reuse_buffers=True)
+    vision = Vision(screen, memo_entries=0) # 测量实际匹配，关闭匹配结果记忆
+
+    print(f"\n=== Vision 基准: {source} ===")
+    measure("Screen.capture()", screen.capture, args.seconds)
+    measure("find_template (整屏)", lambda: vision.find_template(template), args.seconds)
+    if region:
+        measure("find_template (区域)", lambda: vision.find_template(template, region=region), args.seconds)
+    for mode in ("gray", "edge", "exact"):
+        vision.default_mode = mode
+        measure(f"find_template ({mode})", lambda: vision.find_template(template, 0.6), args.seconds)
+    vision.default_mode = "bgr"
+    if args.pyramid_levels > 0:
+        vision.pyramid_levels = args.pyramid_levels
+        measure(f"find_template (金字塔 {args.pyramid_levels} 层)", lambda: vision.find_template(template), args.seconds)
+        vision.pyramid_levels = 0
+
+    # 画面不变时的匹配结果记忆: 复用同一帧 (内容哈希也按帧缓存)，第一次之后都命中记忆，只测量查找开销
+    memo_vision = Vision(screen, frame_cache_ttl=60.0)
+    measure("find_template (记忆命中, 同一帧)", lambda: memo_vision.find_template(template), args.seconds)
+
+
+if __name__ == '__main__':
+    main()
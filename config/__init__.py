@@ -1,5 +1,5 @@
 from .manager import ConfigManager
-from .schema import ConfigDict, VisionConfig, TasksConfig, TogglesConfig, NumericSettings, DEFAULT_CONFIG
+from .schema import ConfigDict, VisionConfig, LocationHintsConfig, CalibrationConfig, PollingConfig, WorkersConfig, PrefilterConfig, MemoConfig, ScreenConfig, RecorderConfig, TasksConfig, TogglesConfig, NumericSettings, DEFAULT_CONFIG
 from .compat import export_ini, import_old_json
 from .migrations import apply_migrations, register_migration
 from .watch import ConfigWatcher
@@ -7,6 +7,14 @@ __all__ = [
     "ConfigManager",
     "ConfigDict",
     "VisionConfig",
+    "ScreenConfig",
+    "LocationHintsConfig",
+    "CalibrationConfig",
+    "PollingConfig",
+    "WorkersConfig",
+    "PrefilterConfig",
+    "MemoConfig",
+    "RecorderConfig",
     "TasksConfig",
     "TogglesConfig",
     "NumericSettings",
@@ -48,7 +48,7 @@ class ConfigManager:
             if not isinstance(loaded, dict):
                 loaded = {}
             for k, v in loaded.items():
-                if k in ("vision", "tasks", "toggles", "numeric_settings", "meta") and isinstance(v, dict):
+                if k in ("vision", "screen", "recorder", "tasks", "toggles", "numeric_settings", "meta") and isinstance(v, dict):
                     merged[k].update(v)
                 else:
                     merged[k] = v
@@ -1,10 +1,98 @@
 from __future__ import annotations
-from typing import TypedDict, Dict, Any, Optional
+from typing import TypedDict, Dict, Any, List, Optional
+
+class LocationHintsConfig(TypedDict, total=False):
+    enabled: bool
+    path: str
+    padding: int
+    max_spots: int
+
+class CalibrationConfig(TypedDict, total=False):
+    enabled: bool
+    anchor_template: str
+    min_scale: float
+    max_scale: float
+    step: float
+    confidence: float
+    cache_path: str
+
+class PollingConfig(TypedDict, total=False):
+    min_interval: float
+    max_interval: float
+    backoff: float
+    change_threshold: int
+    max_idle: float
+
+class WorkersConfig(TypedDict, total=False):
+    enabled: bool
+    processes: int
+    min_templates: int
+
+class PrefilterConfig(TypedDict, total=False):
+    enabled: bool
+    bins: int
+    min_coverage: float
+
+class MemoConfig(TypedDict, total=False):
+    enabled: bool
+    max_entries: int
+    row_stride: int
 
 class VisionConfig(TypedDict, total=False):
     default_confidence: float
     default_timeout: int
     default_interval: float
+    frame_cache_ttl: float
+    pyramid_levels: int
+    template_atlas: str
+    template_cache_mb: float
+    template_miss_ttl: float
+    match_threads: int
+    default_mode: str
+    mode_confidence: Dict[str, float]
+    location_hints: LocationHintsConfig
+    calibration: CalibrationConfig
+    polling: PollingConfig
+    workers: WorkersConfig
+    prefilter: PrefilterConfig
+    memo: MemoConfig
+
+class CaptureThreadConfig(TypedDict, total=False):
+    enabled: bool
+    fps: float
+    ring_size: int
+    max_age_ms: int
+
+class WindowConfig(TypedDict, total=False):
+    enabled: bool
+    title: str
+    anchor_template: str
+    anchor_offset: List[int]
+    size: List[int]
+    crop: List[int]
+    revalidate_interval: float
+
+class ReplayConfig(TypedDict, total=False):
+    source: str
+    pacing: str
+    fps: float
+    loop: bool
+
+class ScreenConfig(TypedDict, total=False):
+    monitor: int
+    reuse_buffers: bool
+    backend: str
+    display_check_interval: float
+    replay: ReplayConfig
+    capture_thread: CaptureThreadConfig
+    window: WindowConfig
+
+class RecorderConfig(TypedDict, total=False):
+    enabled: bool
+    capacity: int
+    scale: float
+    min_frame_interval: float
+    output_dir: str
 
 class TasksConfig(TypedDict, total=False):
     test_task: bool
@@ -123,13 +211,88 @@ class NumericSettings(TypedDict, total=False):
 class ConfigDict(TypedDict, total=False):
     meta: Dict[str, Any]
     vision: VisionConfig
+    screen: ScreenConfig
+    recorder: RecorderConfig
     tasks: TasksConfig
     toggles: TogglesConfig
     numeric_settings: NumericSettings
 
 DEFAULT_CONFIG: ConfigDict = {
     "meta": {"version": 1},
-    "vision": {"default_confidence": 0.8, "default_timeout": 10, "default_interval": 0.5},
+    "vision": {
+        "default_confidence": 0.8,
+        "default_timeout": 10,
+        "default_interval": 0.5,
+        "frame_cache_ttl": 0.1,
+        "pyramid_levels": 0,
+        "template_atlas": "templates.atlas",
+        "template_cache_mb": 64,
+        "template_miss_ttl": 5.0,
+        "match_threads": 0,
+        "default_mode": "bgr",
+        "mode_confidence": {"edge": 0.6},
+        "location_hints": {
+            "enabled": True,
+            "path": "data/template_hints.json",
+            "padding": 32,
+            "max_spots": 3,
+        },
+        "calibration": {
+            "enabled": False,
+            "anchor_template": "",
+            "min_scale": 0.5,
+            "max_scale": 2.0,
+            "step": 0.05,
+            "confidence": 0.8,
+            "cache_path": "data/scale_calibration.json",
+        },
+        "polling": {
+            "min_interval": 0.05,
+            "max_interval": 0.5,
+            "backoff": 1.5,
+            "change_threshold": 12,
+            "max_idle": 2.0,
+        },
+        "workers": {
+            "enabled": False,
+            "processes": 0,
+            "min_templates": 4,
+        },
+        "prefilter": {
+            "enabled": False,
+            "bins": 4,
+            "min_coverage": 0.8,
+        },
+        "memo": {
+            "enabled": True,
+            "max_entries": 256,
+            "row_stride": 4,
+        },
+    },
+    "screen": {
+        "monitor": 1,
+        "reuse_buffers": True,
+        "backend": "mss",
+        "display_check_interval": 10.0,
+        "replay": {"source": "", "pacing": "realtime", "fps": 10, "loop": True},
+        "capture_thread": {"enabled": False, "fps": 10, "ring_size": 4, "max_age_ms": 200},
+        "window": {
+            "enabled": False,
+            "title": "NIKKE",
+            "anchor_template": "",
+            "anchor_offset": [0, 0],
+            "size": [0, 0],
+            "crop": [0, 0, 0, 0],
+            "revalidate_interval": 1.0,
+        },
+    },
+    "recorder": {
+        "enabled": True,
+        "capacity": 60,
+        "scale": 0.25,
+        "min_frame_interval": 0.5,
+        "output_dir": "logs/flight",
+    },
     "tasks": {"test_task": True},
     "toggles": {
         "AutoStartNikke": 0,
@@ -248,9 +411,124 @@ def generate_json_schema() -> Dict[str, Any]:
                     "default_confidence": {"type": "number", "minimum": 0, "maximum": 1},
                     "default_timeout": {"type": "integer", "minimum": 0},
                     "default_interval": {"type": "number", "minimum": 0},
+                    "frame_cache_ttl": {"type": "number", "minimum": 0},
+                    "pyramid_levels": {"type": "integer", "minimum": 0, "maximum": 4},
+                    "template_atlas": {"type": "string"},
+                    "template_cache_mb": {"type": "number", "exclusiveMinimum": 0},
+                    "template_miss_ttl": {"type": "number", "minimum": 0},
+                    "match_threads": {"type": "integer", "minimum": 0},
+                    "default_mode": {"type": "string", "enum": ["bgr", "gray", "b", "g", "r", "edge", "exact"]},
+                    "mode_confidence": {
+                        "type": "object",
+                        "additionalProperties": {"type": "number", "minimum": 0, "maximum": 1},
+                    },
+                    "location_hints": {
+                        "type": "object",
+                        "properties": {
+                            "enabled": {"type": "boolean"},
+                            "path": {"type": "string"},
+                            "padding": {"type": "integer", "minimum": 0},
+                            "max_spots": {"type": "integer", "minimum": 1},
+                        },
+                    },
+                    "calibration": {
+                        "type": "object",
+                        "properties": {
+                            "enabled": {"type": "boolean"},
+                            "anchor_template": {"type": "string"},
+                            "min_scale": {"type": "number", "exclusiveMinimum": 0},
+                            "max_scale": {"type": "number", "exclusiveMinimum": 0},
+                            "step": {"type": "number", "exclusiveMinimum": 0},
+                            "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                            "cache_path": {"type": "string"},
+                        },
+                    },
+                    "polling": {
+                        "type": "object",
+                        "properties": {
+                            "min_interval": {"type": "number", "minimum": 0},
+                            "max_interval": {"type": "number", "minimum": 0},
+                            "backoff": {"type": "number", "minimum": 1},
+                            "change_threshold": {"type": "integer", "minimum": 0, "maximum": 255},
+                            "max_idle": {"type": "number", "minimum": 0},
+                        },
+                    },
+                    "workers": {
+                        "type": "object",
+                        "properties": {
+                            "enabled": {"type": "boolean"},
+                            "processes": {"type": "integer", "minimum": 0},
+                            "min_templates": {"type": "integer", "minimum": 1},
+                        },
+                    },
+                    "prefilter": {
+                        "type": "object",
+                        "properties": {
+                            "enabled": {"type": "boolean"},
+                            "bins": {"type": "integer", "minimum": 2, "maximum": 32},
+                            "min_coverage": {"type": "number", "minimum": 0, "maximum": 1},
+                        },
+                    },
+                    "memo": {
+                        "type": "object",
+                        "properties": {
+                            "enabled": {"type": "boolean"},
+                            "max_entries": {"type": "integer", "minimum": 1},
+                            "row_stride": {"type": "integer", "minimum": 1},
+                        },
+                    },
                 },
                 "required": ["default_confidence", "default_timeout", "default_interval"],
             },
+            "screen": {
+                "type": "object",
+                "properties": {
+                    "monitor": {"type": "integer", "minimum": 0},
+                    "reuse_buffers": {"type": "boolean"},
+                    "backend": {"type": "string", "enum": ["mss", "xshm", "replay"]},
+                    "display_check_interval": {"type": "number", "minimum": 0},
+                    "replay": {
+                        "type": "object",
+                        "properties": {
+                            "source": {"type": "string"},
+                            "pacing": {"type": "string", "enum": ["realtime", "fast", "step"]},
+                            "fps": {"type": "number", "exclusiveMinimum": 0},
+                            "loop": {"type": "boolean"},
+                        },
+                    },
+                    "capture_thread": {
+                        "type": "object",
+                        "properties": {
+                            "enabled": {"type": "boolean"},
+                            "fps": {"type": "number", "exclusiveMinimum": 0},
+                            "ring_size": {"type": "integer", "minimum": 2},
+                            "max_age_ms": {"type": "integer", "minimum": 0},
+                        },
+                    },
+                    "window": {
+                        "type": "object",
+                        "properties": {
+                            "enabled": {"type": "boolean"},
+                            "title": {"type": "string"},
+                            "anchor_template": {"type": "string"},
+                            "anchor_offset": {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+                            "size": {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+                            "crop": {"type": "array", "items": {"type": "integer"}, "minItems": 4, "maxItems": 4},
+                            "revalidate_interval": {"type": "number", "minimum": 0},
+                        },
+                    },
+                },
+            },
+            "recorder": {
+                "type": "object",
+                "properties": {
+                    "enabled": {"type": "boolean"},
+                    "capacity": {"type": "integer", "minimum": 1},
+                    "scale": {"type": "number", "exclusiveMinimum": 0, "maximum": 1},
+                    "min_frame_interval": {"type": "number", "minimum": 0},
+                    "output_dir": {"type": "string"},
+                },
+            },
             "tasks": {"type": "object", "additionalProperties": {"type": "boolean"}},
             "toggles": {"type": "object", "additionalProperties": {"type": "integer", "enum": [0, 1]}},
             "numeric_settings": {"type": "object", "additionalProperties": {"type": ["integer", "number", "string"]}},
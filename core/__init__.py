@@ -6,13 +6,44 @@
 """
 
 from .controls import Controls
-from .screen import Screen
-from .vision import Vision
+from .screen import Screen, CaptureService
+from .vision import Vision, Match, Blob
 from .automation import Automation
+from .window import GameWindow
+from .recorder import FlightRecorder
+from .hints import LocationHints
+from .atlas import TemplateAtlas, build_atlas
+from .template_cache import TemplateCache
+from .registry import TemplateRegistry, TemplateSpec
+from .calibration import ScaleCalibrator
+from .poller import AdaptivePoller
+from .workers import MatchWorkerPool
+from .prefilter import HistogramPrefilter
+from .backends import CaptureBackend, MssBackend, XShmBackend, ReplayBackend, create_backend
 
 __all__ = [
     'Controls',
     'Screen', 
+    'CaptureService',
     'Vision',
-    'Automation'
+    'Match',
+    'Blob',
+    'Automation',
+    'GameWindow',
+    'FlightRecorder',
+    'LocationHints',
+    'TemplateAtlas',
+    'build_atlas',
+    'TemplateCache',
+    'TemplateRegistry',
+    'TemplateSpec',
+    'ScaleCalibrator',
+    'AdaptivePoller',
+    'MatchWorkerPool',
+    'HistogramPrefilter',
+    'CaptureBackend',
+    'MssBackend',
+    'XShmBackend',
+    'ReplayBackend',
+    'create_backend'
 ]
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+模板图集: 把 templates/ 目录预先编译成单个二进制文件，运行时用 np.memmap 映射。
+
+- 启动时只读取索引，不解码任何 PNG；首次匹配时直接使用映射的像素
+- 多个机器人进程映射同一个文件时共享操作系统的页缓存
+- 除原始 BGR 像素外，还保存灰度图和金字塔缩小图等派生版本
+
+文件格式 (小端):
+    8 字节魔数 | uint32 格式版本 | uint32 索引长度 | 索引 JSON | 对齐到 64 字节的像素数据
+索引按模板相对路径 (如 "arena/victory.png") 记录每个版本的偏移和形状，
+以及源文件的大小和修改时间，源文件变化后该模板自动回退到 cv2.imread。
+
+构建:
+    python -m core.atlas templates templates.atlas
+"""
+
+import argparse
+import json
+import os
+import struct
+
+import cv2
+import numpy as np
+
+MAGIC = b"DBATLAS\0"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _variants(image, pyramid_levels):
+    """生成模板的各个版本: bgr (原图)、gray、pyr1..pyrN (与 Vision 金字塔匹配使用的缩小方式一致)。"""
+    variants = {"bgr": image, "gray": cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)}
+    small = image
+    for level in range(1, pyramid_levels + 1):
+        small = cv2.pyrDown(small)
+        variants[f"pyr{level}"] = small
+    return variants
+
+
+def build_atlas(template_dir, output_path, pyramid_levels=2):
+    """
+    把 template_dir 下的所有 PNG (含子目录) 编译为图集文件。
+    :param template_dir: 模板目录
+    :param output_path: 输出的图集文件路径
+    :param pyramid_levels: 额外保存的金字塔缩小层数
+    :return: 写入的模板数量
+    """
+    entries = {}
+    blobs = []
+    offset = 0
+    for dirpath, _dirnames, filenames in sorted(os.walk(template_dir)):
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(".png"):
+                continue
+            source = os.path.join(dirpath, filename)
+            image = cv2.imread(source, cv2.IMREAD_COLOR)
+            if image is None:
+                print(f"[Atlas] 跳过无法读取的模板: {source}")
+                continue
+            stat = os.stat(source)
+            name = os.path.relpath(source, template_dir).replace(os.sep, "/")
+            variants = {}
+            for variant, array in _variants(image, pyramid_levels).items():
+                array = np.ascontiguousarray(array)
+                variants[variant] = {"offset": offset, "shape": list(array.shape)}
+                blobs.append((offset, array))
+                offset = _align(offset + array.nbytes)
+            entries[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "variants": variants}
+
+    index = json.dumps({"version": FORMAT_VERSION, "entries": entries}, ensure_ascii=False).encode("utf-8")
+    data_start = _align(_HEADER.size + len(index))
+    tmp = output_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(index)))
+        f.write(index)
+        for blob_offset, array in blobs:
+            f.seek(data_start + blob_offset)
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, output_path)
+    print(f"[Atlas] 已编译 {len(entries)} 个模板到 {output_path} ({(data_start + offset) / 1024:.1f} KB)")
+    return len(entries)
+
+
+class TemplateAtlas:
+    """只读映射一个图集文件，按模板路径取出各个版本的像素 (只读 ndarray，直接指向映射的页)。"""
+
+    def __init__(self, path, template_dir="templates"):
+        """
+        :param path: 图集文件路径
+        :param template_dir: 编译图集时使用的模板目录，用于把 "templates/arena/x.png" 换算为索引键
+        """
+        self.path = path
+        self.template_dir = template_dir
+        with open(path, "rb") as f:
+            magic, version, index_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} 不是模板图集文件")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"图集格式版本 {version} 与当前版本 {FORMAT_VERSION} 不一致，请重新编译")
+            self.entries = json.loads(f.read(index_len).decode("utf-8"))["entries"]
+        self._data_start = _align(_HEADER.size + index_len)
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        self._checked = {} # 索引键 -> 源文件是否仍与图集一致
+        print(f"[Atlas] 已映射模板图集 {path} ({len(self.entries)} 个模板)")
+
+    def _key(self, template_path):
+        rel = os.path.relpath(os.path.normpath(template_path), os.path.normpath(self.template_dir))
+        return rel.replace(os.sep, "/")
+
+    def _fresh(self, key, template_path):
+        """源文件存在且大小或修改时间与编译时不同，说明图集已过期。"""
+        if key not in self._checked:
+            entry = self.entries[key]
+            try:
+                stat = os.stat(template_path)
+                fresh = stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+            except OSError:
+                fresh = True # 只部署图集、没有源文件
+            if not fresh:
+                print(f"[Atlas] {template_path} 在编译图集后被修改，改为直接读取 PNG")
+            self._checked[key] = fresh
+        return self._checked[key]
+
+    def get(self, template_path, variant="bgr"):
+        """
+        取出模板的某个版本；图集中没有该模板/版本，或源文件已更新时返回 None。
+        :param variant: "bgr"、"gray" 或 "pyr1".."pyrN"
+        """
+        key = self._key(template_path)
+        entry = self.entries.get(key)
+        if entry is None or variant not in entry["variants"] or not self._fresh(key, template_path):
+            return None
+        info = entry["variants"][variant]
+        return np.ndarray(tuple(info["shape"]), dtype=np.uint8, buffer=self._map,
+                          offset=self._data_start + info["offset"])
+
+    def __contains__(self, template_path):
+        return self._key(template_path) in self.entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="把模板目录编译为内存映射图集")
+    parser.add_argument("template_dir", nargs="?", default="templates", help="模板目录")
+    parser.add_argument("output", nargs="?", default="templates.atlas", help="输出文件")
+    parser.add_argument("--pyramid-levels", type=int, default=2, help="额外保存的金字塔缩小层数")
+    args = parser.parse_args()
+    build_atlas(args.template_dir, args.output, args.pyramid_levels)
@@ -7,12 +7,14 @@
 
 import time
 import random
-import pyautogui
 import cv2
 import numpy as np
 from typing import Tuple, Optional, List
 import logging
 
+# 与 Controls 相同，pyautogui 在创建 Automation 时才导入，使 core 包在无显示环境下也能导入
+pyautogui = None
+
 class Automation:
     """核心自动化类，提供通用的自动化功能"""
     
@@ -23,6 +25,8 @@ class Automation:
         :param controls_instance: Controls实例（可选）
         :param default_confidence: 默认相似度阈值
         """
+        global pyautogui
+        import pyautogui
         self.vision = vision_instance
         self.controls = controls_instance
         self.default_confidence = default_confidence
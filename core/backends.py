@@ -0,0 +1,443 @@
+"""
+截图后端
+Screen 通过后端取得原始像素，便于在没有桌面的环境下用录制好的画面回放、调试和基准测试 Vision。
+"""
+
+import ctypes
+import ctypes.util
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import mss
+except Exception:  # pragma: no cover - 回放后端不需要 mss
+    mss = None
+
+
+class CaptureBackend:
+    """
+    截图后端接口。
+    - monitors: 与 mss 相同格式的显示器列表 (下标 0 为全部显示器的并集，1 起为各个显示器)
+    - grab(area): 截取屏幕绝对坐标下的区域 {'left','top','width','height'}，
+      返回 (h, w, 4) BGRA 或 (h, w, 3) BGR 的 uint8 数组；可能是内部缓冲区的视图，调用方不得修改
+    - volatile: 为 True 时 grab() 返回的视图会被下一次 grab() 覆盖 (如共享内存段)，需要保留时必须复制
+    - refresh_monitors(): 重新枚举显示器 (分辨率或系统缩放变化后)，返回新的 monitors
+    """
+
+    name = "base"
+    volatile = False
+
+    @property
+    def monitors(self):
+        raise NotImplementedError
+
+    def refresh_monitors(self):
+        # 默认显示器列表不会变化 (如回放源)
+        return self.monitors
+
+    def grab(self, area):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssBackend(CaptureBackend):
+    """基于 mss 的实时截图 (默认后端)。"""
+
+    name = "mss"
+
+    def __init__(self):
+        if mss is None:
+            raise RuntimeError("Missing dependency: mss. Please install mss to capture the live screen.")
+        self.sct = mss.mss()
+
+    @property
+    def monitors(self):
+        return self.sct.monitors
+
+    def refresh_monitors(self):
+        # mss 只在第一次访问 monitors 时枚举并缓存，换一个实例才能读到新的显示器配置
+        sct = mss.mss()
+        self.sct.close()
+        self.sct = sct
+        return self.sct.monitors
+
+    def grab(self, area):
+        sct_img = self.sct.grab(area)
+        # 直接包装 mss 的原始缓冲区，不复制像素
+        return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+
+    def close(self):
+        self.sct.close()
+
+
+class ReplayBackend(CaptureBackend):
+    """
+    回放录制好的画面: PNG 目录、.npy 帧堆栈 (N, h, w, 3|4) 或视频文件。
+    节奏 (pacing):
+    - realtime: 按 fps 随真实时间推进，模拟实时画面
+    - fast: 每次 grab 前进一帧，尽可能快地回放 (适合基准测试)
+    - step: 只有调用 step() 才前进，便于逐帧确定性地驱动任务流程
+    """
+
+    name = "replay"
+    PACINGS = ("realtime", "fast", "step")
+    VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov", ".webm")
+
+    def __init__(self, source, pacing="realtime", fps=10.0, loop=True):
+        """
+        :param source: PNG 目录、.npy 文件或视频文件路径
+        :param pacing: realtime / fast / step
+        :param fps: realtime 节奏下的回放帧率
+        :param loop: 播放到末尾后是否从头循环；否则停在最后一帧并置 finished=True
+        """
+        if pacing not in self.PACINGS:
+            raise ValueError(f"未知的回放节奏: {pacing} (可选: {', '.join(self.PACINGS)})")
+        self.source = source
+        self.pacing = pacing
+        self.fps = max(0.1, float(fps))
+        self.loop = loop
+        self.finished = False
+        self._frames = None # PNG/npy 的帧序列 (npy 使用内存映射)
+        self._video = None
+        self._video_pos = 0
+        self._video_frame = None
+        self._video_frame_index = -1
+        self._open(source)
+        self._index = 0
+        self._grabs = 0
+        self._started_at = time.monotonic()
+        height, width = self._frame_at(0).shape[:2]
+        area = {'left': 0, 'top': 0, 'width': width, 'height': height}
+        self._monitors = [dict(area), dict(area)]
+        print(f"[Replay] 已加载 {source} ({self.frame_count} 帧, {width}x{height}, 节奏: {pacing})")
+
+    def _open(self, source):
+        if os.path.isdir(source):
+            paths = sorted(glob.glob(os.path.join(source, "*.png")))
+            if not paths:
+                raise FileNotFoundError(f"回放目录中没有 PNG 文件: {source}")
+            self._frames = [cv2.imread(p, cv2.IMREAD_COLOR) for p in paths]
+            self.frame_count = len(self._frames)
+        elif source.lower().endswith(".npy"):
+            stack = np.load(source, mmap_mode="r")
+            if stack.ndim != 4 or stack.shape[-1] not in (3, 4) or stack.dtype != np.uint8:
+                raise ValueError(f".npy 回放文件必须是 (N, h, w, 3|4) 的 uint8 数组: {source}")
+            self._frames = stack
+            self.frame_count = stack.shape[0]
+        elif source.lower().endswith(self.VIDEO_EXTS):
+            self._video = cv2.VideoCapture(source)
+            if not self._video.isOpened():
+                raise FileNotFoundError(f"无法打开回放视频: {source}")
+            self.frame_count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+        else:
+            raise ValueError(f"不支持的回放源: {source}")
+
+    def _frame_at(self, index):
+        if self._frames is not None:
+            return self._frames[index]
+        if index != self._video_frame_index:
+            if index != self._video_pos:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ok, frame = self._video.read()
+            if ok:
+                self._video_frame = frame
+                self._video_frame_index = index
+                self._video_pos = index + 1
+            elif self._video_frame is None:
+                raise RuntimeError(f"无法从回放视频读取帧: {self.source}")
+        return self._video_frame
+
+    def _clamp(self, index):
+        if index < self.frame_count:
+            return index
+        if self.loop:
+            return index % self.frame_count
+        self.finished = True
+        return self.frame_count - 1
+
+    def _current_index(self):
+        if self.pacing == "realtime":
+            return self._clamp(int((time.monotonic() - self._started_at) * self.fps))
+        if self.pacing == "fast":
+            index = self._clamp(self._grabs)
+            self._grabs += 1
+            return index
+        return self._index
+
+    def step(self, count=1):
+        """step 节奏下前进 count 帧。"""
+        self._index = self._clamp(self._index + count)
+
+    def reset(self):
+        """回到第一帧并重新计时。"""
+        self._index = 0
+        self._grabs = 0
+        self.finished = False
+        self._started_at = time.monotonic()
+
+    @property
+    def monitors(self):
+        return self._monitors
+
+    def grab(self, area):
+        frame = self._frame_at(self._current_index())
+        left, top = area['left'], area['top']
+        return frame[top:top + area['height'], left:left + area['width']]
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+
+
+class _XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+        ("obdata", ctypes.c_void_p),
+        ("funcs", ctypes.c_void_p * 6),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+# X 错误码，按 Display 指针区分。XSetErrorHandler 是进程级的，所有 XShmBackend 实例共用一个处理函数；
+# Xlib 在出错请求所在连接的调用中同步调用它，而每个实例 (如截图线程和主线程各自的 Screen) 都有自己的连接，
+# 按连接记录才不会把一个线程的错误报告给另一个线程
+_x_errors = {}
+
+
+@_X_ERROR_HANDLER
+def _on_x_error(display, event):
+    # XErrorEvent (64 位): type, display, resourceid, serial 之后的第 32 字节是 error_code
+    _x_errors[display] = ctypes.cast(event, ctypes.POINTER(ctypes.c_ubyte * 40)).contents[32]
+    return 0
+
+
+class XShmBackend(CaptureBackend):
+    """
+    X11 MIT-SHM 截图 (Linux / Xvfb)。
+    XGetImage 会把每一帧经 X 协议复制一遍；这里改用 XShmGetImage，由 X 服务器直接把像素写入共享内存段。
+    整个根窗口大小的共享内存段只分配一次，所有尺寸的截图都复用它 (每种尺寸只创建一个轻量的 XImage 头)。
+    grab() 返回共享内存段的视图，下一次 grab() 会覆盖其内容 (volatile)。
+    """
+
+    name = "xshm"
+    volatile = True
+
+    _IPC_PRIVATE = 0
+    _IPC_CREAT = 0o1000
+    _IPC_RMID = 0
+    _ZPIXMAP = 2
+    _ALL_PLANES = 0xFFFFFFFF
+
+    def __init__(self, display=None):
+        """
+        :param display: X 显示名 (如 ":99")，默认读取 DISPLAY 环境变量
+        """
+        self._xlib = self._load("X11")
+        self._xext = self._load("Xext")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._declare()
+        self._dpy = None
+        self._shm = None
+        self._images = {}
+        # X 的默认错误处理会直接结束进程，这里只记录错误，由调用方抛出异常
+        self._xlib.XSetErrorHandler(_on_x_error)
+
+        self._dpy = self._xlib.XOpenDisplay(display.encode() if display else None)
+        if not self._dpy:
+            raise RuntimeError(f"无法连接 X 显示 {display or os.environ.get('DISPLAY', '')}")
+        if not self._xext.XShmQueryExtension(self._dpy):
+            self.close()
+            raise RuntimeError("X 服务器不支持 MIT-SHM 扩展")
+        screen = self._xlib.XDefaultScreen(self._dpy)
+        self._root = self._xlib.XRootWindow(self._dpy, screen)
+        self._visual = self._xlib.XDefaultVisual(self._dpy, screen)
+        self._depth = self._xlib.XDefaultDepth(self._dpy, screen)
+        width = self._xlib.XDisplayWidth(self._dpy, screen)
+        height = self._xlib.XDisplayHeight(self._dpy, screen)
+        self._monitors = self._enumerate_monitors(width, height)
+        self._attach_segment(width * height * 4)
+
+    @staticmethod
+    def _load(name):
+        path = ctypes.util.find_library(name)
+        if not path:
+            raise RuntimeError(f"找不到 lib{name}，XShm 截图后端不可用")
+        return ctypes.CDLL(path)
+
+    def _declare(self):
+        xlib, xext, libc = self._xlib, self._xext, self._libc
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XSetErrorHandler.argtypes = [_X_ERROR_HANDLER]
+        xlib.XSetErrorHandler.restype = ctypes.c_void_p
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDestroyImage.argtypes = [ctypes.POINTER(_XImage)]
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+            ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        ]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage), ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        ]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    @staticmethod
+    def _enumerate_monitors(width, height):
+        """优先沿用 mss 的显示器枚举 (XRandR)；不可用时把整个根窗口视为一个显示器。"""
+        if mss is not None:
+            try:
+                with mss.mss() as sct:
+                    return [dict(m) for m in sct.monitors]
+            except Exception:
+                pass
+        area = {'left': 0, 'top': 0, 'width': width, 'height': height}
+        return [dict(area), dict(area)]
+
+    def _attach_segment(self, size):
+        shm = _XShmSegmentInfo()
+        shm.shmid = self._libc.shmget(self._IPC_PRIVATE, size, self._IPC_CREAT | 0o600)
+        if shm.shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget 失败")
+        shm.shmaddr = self._libc.shmat(shm.shmid, None, 0)
+        if shm.shmaddr in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(shm.shmid, self._IPC_RMID, None)
+            raise OSError(ctypes.get_errno(), "shmat 失败")
+        shm.readOnly = 0
+        _x_errors.pop(self._dpy, None)
+        ok = self._xext.XShmAttach(self._dpy, ctypes.byref(shm))
+        self._xlib.XSync(self._dpy, 0)
+        # 双方都已连接后立即标记删除，进程退出时段会被自动回收
+        self._libc.shmctl(shm.shmid, self._IPC_RMID, None)
+        if not ok or _x_errors.pop(self._dpy, None) is not None:
+            self._libc.shmdt(shm.shmaddr)
+            raise RuntimeError("XShmAttach 失败 (X 服务器是否在远程主机上?)")
+        self._shm = shm
+        self._shm_size = size
+
+    def _image(self, width, height):
+        image = self._images.get((width, height))
+        if image is None:
+            if width * height * 4 > self._shm_size:
+                raise ValueError(f"截图区域 {width}x{height} 超出根窗口大小")
+            image = self._xext.XShmCreateImage(
+                self._dpy, self._visual, self._depth, self._ZPIXMAP, self._shm.shmaddr,
+                ctypes.byref(self._shm), width, height,
+            )
+            if not image:
+                raise RuntimeError(f"XShmCreateImage 失败 ({width}x{height})")
+            if image.contents.bits_per_pixel != 32:
+                raise RuntimeError(f"不支持的像素格式: {image.contents.bits_per_pixel} bpp")
+            self._images[(width, height)] = image
+        return image
+
+    @property
+    def monitors(self):
+        return self._monitors
+
+    def refresh_monitors(self):
+        root = self._monitors[0]
+        monitors = self._enumerate_monitors(root['width'], root['height'])
+        size = monitors[0]['width'] * monitors[0]['height'] * 4
+        if size > self._shm_size:
+            # 根窗口变大，原来的共享内存段放不下整屏，换一个更大的段
+            self._release_images()
+            self._detach_segment()
+            self._attach_segment(size)
+        self._monitors = monitors
+        return monitors
+
+    def grab(self, area):
+        width, height = area['width'], area['height']
+        image = self._image(width, height)
+        _x_errors.pop(self._dpy, None)
+        ok = self._xext.XShmGetImage(self._dpy, self._root, image, area['left'], area['top'], self._ALL_PLANES)
+        code = _x_errors.pop(self._dpy, None)
+        if not ok or code is not None:
+            raise RuntimeError(f"XShmGetImage 失败 (区域: {area}, X 错误码: {code})")
+        stride = image.contents.bytes_per_line
+        buf = (ctypes.c_ubyte * (stride * height)).from_address(self._shm.shmaddr)
+        return np.frombuffer(buf, dtype=np.uint8).reshape(height, stride // 4, 4)[:, :width]
+
+    def _release_images(self):
+        for image in self._images.values():
+            # data 指向共享内存段、obdata 指向我们的段信息结构，都不能交给 XDestroyImage 释放
+            image.contents.data = None
+            image.contents.obdata = None
+            self._xlib.XDestroyImage(image)
+        self._images.clear()
+
+    def _detach_segment(self):
+        if self._shm is not None and self._dpy:
+            self._xext.XShmDetach(self._dpy, ctypes.byref(self._shm))
+            self._xlib.XSync(self._dpy, 0)
+            self._libc.shmdt(self._shm.shmaddr)
+            self._shm = None
+
+    def close(self):
+        self._release_images()
+        self._detach_segment()
+        if self._dpy:
+            self._xlib.XCloseDisplay(self._dpy)
+            _x_errors.pop(self._dpy, None)
+            self._dpy = None
+
+
+def create_backend(name="mss", **options):
+    """
+    按名称创建截图后端。
+    :param name: mss / xshm / replay
+    :param options: 传给后端构造函数的参数 (如 replay 的 source、pacing、fps、loop)
+    """
+    if name in (None, "", "mss"):
+        return MssBackend()
+    if name == "xshm":
+        return XShmBackend(**options)
+    if name == "replay":
+        return ReplayBackend(**options)
+    raise ValueError(f"未知的截图后端: {name}")
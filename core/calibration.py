@@ -0,0 +1,137 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+class ScaleCalibrator:
+    """
+    按锚点模板校准模板缩放比例 (游戏分辨率或 Windows 缩放与截取模板时不同的情况)。
+    在一系列缩放比例下匹配锚点，取得分最高的比例交给 Vision.set_template_scale()，
+    之后所有模板只在加载时缩放一次。结果按显示配置 (显示器尺寸 + 截图范围尺寸) 缓存到磁盘；
+    截图范围或显示器尺寸 (分辨率、系统缩放) 变化时自动改用对应配置的缓存结果，没有缓存则重新校准。
+    """
+
+    def __init__(self, vision, anchor_template, min_scale=0.5, max_scale=2.0, step=0.05, confidence=0.8,
+                 cache_path="data/scale_calibration.json"):
+        """
+        :param vision: Vision 实例 (使用其 Screen 截图，并设置其模板缩放比例)
+        :param anchor_template: 锚点模板路径，应为校准时一定可见的界面元素
+        :param min_scale: 搜索的最小缩放比例
+        :param max_scale: 搜索的最大缩放比例
+        :param step: 粗搜索步长，最佳比例附近再以 step / 5 细化
+        :param confidence: 锚点的最低相似度，低于该值视为校准失败 (保留当前比例，不写缓存)
+        :param cache_path: 缓存文件路径 (JSON)，为空时只保存在内存中
+        """
+        self.vision = vision
+        self.screen = vision.screen
+        self.anchor_template = anchor_template
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+        self.confidence = confidence
+        self.cache_path = cache_path
+        self._cache = self._load()
+        self._calibrated_key = None # 上次校准时的显示配置 (见 _key)
+        self.screen.add_bounds_listener(self._on_bounds_changed)
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError) as e:
+            print(f"[Calibration] 读取缩放缓存失败，将重新校准: {e}")
+            return {}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, indent=2)
+        except OSError as e:
+            print(f"[Calibration] 保存缩放缓存失败: {e}")
+
+    def _key(self):
+        """当前显示配置: 显示器尺寸 + 截图范围 (显示器或游戏窗口) 尺寸，同时区分锚点模板。"""
+        display, bounds = self.screen.display, self.screen.monitor
+        return (f"{display['width']}x{display['height']}/{bounds['width']}x{bounds['height']}/"
+                f"{os.path.basename(self.anchor_template)}")
+
+    @staticmethod
+    def _match(image, anchor, scale):
+        """按 scale 缩放锚点后在 image 上匹配，返回 (相似度, 左上角位置)。"""
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        scaled = cv2.resize(anchor, None, fx=scale, fy=scale, interpolation=interpolation)
+        if (scaled.shape[0] < 4 or scaled.shape[1] < 4
+                or scaled.shape[0] > image.shape[0] or scaled.shape[1] > image.shape[1]):
+            return -1.0, (0, 0)
+        result = cv2.matchTemplate(image, scaled, cv2.TM_CCOEFF_NORMED)
+        _min_val, max_val, _min_loc, max_loc = cv2.minMaxLoc(result)
+        return max_val, max_loc
+
+    def measure(self, image):
+        """
+        在 image 上搜索锚点的最佳缩放比例。
+        粗搜索在缩小一半的画面上进行；细化只在粗搜索找到的位置附近的全分辨率窗口内进行。
+        :return: (scale, score)
+        """
+        anchor = cv2.imread(self.anchor_template, cv2.IMREAD_COLOR)
+        if anchor is None:
+            print(f"[Calibration] 错误: 无法读取锚点模板 {self.anchor_template}")
+            return 1.0, -1.0
+        small = cv2.pyrDown(image)
+        best_scale, best_score, best_loc = self.min_scale, -1.0, (0, 0)
+        for scale in np.arange(self.min_scale, self.max_scale + self.step / 2, self.step):
+            score, loc = self._match(small, anchor, scale / 2)
+            if score > best_score:
+                best_scale, best_score, best_loc = scale, score, loc
+
+        # 细化窗口: 覆盖最大可能尺寸的锚点及缩小带来的定位误差
+        anchor_h, anchor_w = anchor.shape[:2]
+        pad = 4
+        left, top = max(best_loc[0] * 2 - pad, 0), max(best_loc[1] * 2 - pad, 0)
+        window = image[top:top + int(anchor_h * (best_scale + self.step)) + 2 * pad,
+                       left:left + int(anchor_w * (best_scale + self.step)) + 2 * pad]
+        best_score = -1.0
+        fine_step = self.step / 5
+        for scale in np.arange(best_scale - self.step + fine_step, best_scale + self.step, fine_step):
+            if self.min_scale <= scale <= self.max_scale:
+                score, _loc = self._match(window, anchor, scale)
+                if score > best_score:
+                    best_scale, best_score = scale, score
+        return round(float(best_scale), 3), float(best_score)
+
+    def calibrate(self, force=False):
+        """
+        为当前显示配置设置模板缩放比例: 有缓存时直接使用，否则截图校准。
+        :param force: 忽略缓存重新校准
+        :return: 使用的缩放比例；校准失败时返回 None (保留当前比例)
+        """
+        key = self._key()
+        self._calibrated_key = key
+        if not force and key in self._cache:
+            self.vision.set_template_scale(self._cache[key])
+            return self._cache[key]
+
+        image = self.screen.capture()
+        scale, score = self.measure(image)
+        if score < self.confidence:
+            print(f"[Calibration] 警告: 未找到锚点 {os.path.basename(self.anchor_template)} "
+                  f"(最高相似度 {score:.3f})，保留当前缩放比例 {self.vision.template_scale:.3f}")
+            return None
+        print(f"[Calibration] {key}: 缩放比例 {scale:.3f} (相似度 {score:.3f})")
+        self._cache[key] = scale
+        self._save()
+        self.vision.set_template_scale(scale)
+        return scale
+
+    def _on_bounds_changed(self, _bounds):
+        """截图范围或显示器尺寸变化后原来的缩放比例不再可信，改用新配置的缓存或重新校准。"""
+        if self._calibrated_key is not None and self._key() != self._calibrated_key:
+            self.calibrate()
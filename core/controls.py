@@ -1,24 +1,57 @@
-import pyautogui
 import time
 import math
+import numpy as np
+from .poller import AdaptivePoller
+
+# pyautogui 在创建 Controls 时才导入: 没有 DISPLAY 的 Linux 上导入即失败，
+# 而 core 包的其他部分 (回放后端、基准、离线调试) 不需要它
+pyautogui = None
+
+def _to_rgb(color):
+    """"#RRGGBB" 或 (r, g, b) -> (r, g, b)。"""
+    if isinstance(color, str):
+        color = color.lstrip('#')
+        return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+    return tuple(color)
 
 class Controls:
     def __init__(self, screen_instance=None):
         """
         初始化鼠标/键盘控制器。
-        :param screen_instance: Screen实例，用于坐标转换
+        :param screen_instance: Screen实例，用于坐标转换 (设置后所有坐标均相对截图范围，即显示器或游戏窗口)
         """
+        global pyautogui
+        import pyautogui
         # 启用 pyautogui 的安全特性：将鼠标猛地移到屏幕左上角会中断程序
         pyautogui.FAILSAFE = True
         # 为所有 pyautogui 操作添加一个短暂的通用延迟，使其更稳定
         pyautogui.PAUSE = 0.25 
         self.screen = screen_instance
+        self.recorder = None # 可选的 FlightRecorder
+        self.poller = AdaptivePoller() # wait_for_pixel_color 使用的轮询器
         print("[Controls] 控制器已初始化 (安全模式: ON, 默认暂停: 0.25s)")
     
     def set_screen(self, screen_instance):
         """设置Screen实例用于坐标转换"""
         self.screen = screen_instance
 
+    def set_recorder(self, recorder):
+        """设置 (或用 None 取消) FlightRecorder，记录所有鼠标/键盘操作。"""
+        self.recorder = recorder
+
+    def _record(self, action, **details):
+        if self.recorder is not None:
+            self.recorder.record_action(action, **details)
+
+    def _to_screen(self, x, y):
+        """
+        把相对截图范围 (显示器或游戏窗口) 的坐标换算为 pyautogui 使用的屏幕绝对坐标。
+        未设置 Screen 时原样返回。
+        """
+        if self.screen is None:
+            return x, y
+        return self.screen.to_absolute(x, y)
+
     def user_click(self, sX, sY, k=1.0):
         """
         点击转换后的坐标，类似AHK的UserClick函数
@@ -26,11 +59,11 @@ class Controls:
         :param sY: 源Y坐标  
         :param k: 缩放因子
         """
-        uX = round(sX * k)
-        uY = round(sY * k)
+        uX, uY = self._to_screen(round(sX * k), round(sY * k))
         try:
             pyautogui.moveTo(uX, uY, duration=0.1)
             pyautogui.click()
+            self._record("user_click", source=(sX, sY), screen=(uX, uY))
             print(f"[Controls] UserClick at ({uX}, {uY}) from source ({sX}, {sY}) with scale {k}")
         except pyautogui.FailSafeException:
             print("[Controls] 安全模式触发！程序已由用户中断。")
@@ -44,10 +77,10 @@ class Controls:
         :param sY: 源Y坐标
         :param k: 缩放因子
         """
-        uX = round(sX * k)
-        uY = round(sY * k)
+        uX, uY = self._to_screen(round(sX * k), round(sY * k))
         try:
             pyautogui.mouseDown(uX, uY)
+            self._record("user_press", source=(sX, sY), screen=(uX, uY))
             print(f"[Controls] UserPress at ({uX}, {uY}) from source ({sX}, {sY}) with scale {k}")
         except pyautogui.FailSafeException:
             print("[Controls] 安全模式触发！程序已由用户中断。")
@@ -61,10 +94,10 @@ class Controls:
         :param sY: 源Y坐标
         :param k: 缩放因子
         """
-        uX = round(sX * k)
-        uY = round(sY * k)
+        uX, uY = self._to_screen(round(sX * k), round(sY * k))
         try:
             pyautogui.moveTo(uX, uY, duration=0.2)
+            self._record("user_move", source=(sX, sY), screen=(uX, uY))
             print(f"[Controls] UserMove to ({uX}, {uY}) from source ({sX}, {sY}) with scale {k}")
         except pyautogui.FailSafeException:
             print("[Controls] 安全模式触发！程序已由用户中断。")
@@ -90,10 +123,12 @@ class Controls:
 
     def click_at(self, x, y):
         """在指定坐标 (x, y) 执行一次安全的单击。"""
+        x, y = self._to_screen(x, y)
         try:
             # 先移动再点击，更像人类
             pyautogui.moveTo(x, y, duration=0.1)
             pyautogui.doubleClick()
+            self._record("click_at", screen=(x, y))
             print(f"[Controls] Clicked at ({int(x)}, {int(y)})")
         except pyautogui.FailSafeException:
             print("[Controls] 安全模式触发！程序已由用户中断。")
@@ -102,8 +137,10 @@ class Controls:
 
     def move_to(self, x, y, duration=0.2):
         """平滑移动鼠标到 (x, y)，用于调试或查看。"""
+        x, y = self._to_screen(x, y)
         try:
             pyautogui.moveTo(x, y, duration=duration)
+            self._record("move_to", screen=(x, y))
             print(f"[Controls] Moved to ({int(x)}, {int(y)})")
         except pyautogui.FailSafeException:
             print("[Controls] 安全模式触发！程序已由用户中断。")
@@ -113,6 +150,7 @@ class Controls:
     def press_key(self, key):
         try:
             pyautogui.press(key)
+            self._record("press_key", key=key)
             print(f"[Controls] Pressed key {key}")
         except pyautogui.FailSafeException:
             print("[Controls] 安全模式触发！程序已由用户中断。")
@@ -122,34 +160,90 @@ class Controls:
     def get_pixel_color(self, x, y):
         """获取指定坐标的像素颜色，返回格式为"#RRGGBB" """
         try:
-            r, g, b = pyautogui.pixel(x, y)
+            r, g, b = pyautogui.pixel(*self._to_screen(x, y))
             return f"#{r:02x}{g:02x}{b:02x}"
         except Exception as e:
             print(f"[Controls] 错误: 无法获取像素颜色 at ({x}, {y}): {e}")
             return None
 
-    def wait_for_pixel_color(self, x, y, target_color, timeout=10, interval=0.5, threshold=15):
+    def _grab_pixels(self, xs, ys):
+        """
+        只截取包含所有采样点的最小矩形，返回每个点的 (r, g, b) (N×3 int32) 和点是否在截图内的掩码；截图失败时返回 None。
+        设置了 Screen 时使用其后端截图 (不做颜色转换)，否则用 pyautogui.screenshot 截取同一矩形。
+        """
+        left, top = int(xs.min()), int(ys.min())
+        rect = (left, top, int(xs.max()) - left + 1, int(ys.max()) - top + 1)
+        if self.screen is not None:
+            rect = self.screen.clip_region(rect)
+            if rect is None:
+                return np.zeros((len(xs), 3), dtype=np.int32), np.zeros(len(xs), dtype=bool)
+            image = self.screen.capture(rect, color=False)
+            if image is None:
+                return None
+            rgb = image[..., 2::-1] # 后端数据为 BGRA 或 BGR
+        else:
+            rgb = np.asarray(pyautogui.screenshot(region=rect))[..., :3]
+        cols, rows = xs - rect[0], ys - rect[1]
+        inside = (cols >= 0) & (rows >= 0) & (cols < rgb.shape[1]) & (rows < rgb.shape[0])
+        pixels = np.zeros((len(xs), 3), dtype=np.int32)
+        pixels[inside] = rgb[rows[inside], cols[inside]]
+        return pixels, inside
+
+    def probe_pixels(self, checks):
+        """
+        用一次截图检查多个像素的颜色，代替逐个调用 get_pixel_color (pyautogui.pixel 在部分平台上每个像素都要截一次整屏)。
+        判断规则与 is_similar_color 相同: 与目标颜色的 RGB 欧氏距离小于阈值。
+        :param checks: [(x, y, target_color, threshold), ...]，target_color 为 "#RRGGBB" 或 (r, g, b)，
+                       threshold 可省略 (默认 15)；坐标相对截图范围 (与 click_at 相同)
+        :return: 与 checks 顺序相同的 bool 列表；截图失败或坐标超出截图范围的项为 False
+        """
+        if not checks:
+            return []
+        xs = np.array([check[0] for check in checks], dtype=np.int64)
+        ys = np.array([check[1] for check in checks], dtype=np.int64)
+        targets = np.array([_to_rgb(check[2]) for check in checks], dtype=np.int32)
+        thresholds = np.array([check[3] if len(check) > 3 else 15 for check in checks], dtype=np.float64)
+        try:
+            sampled = self._grab_pixels(xs, ys)
+        except Exception as e:
+            print(f"[Controls] 错误: 无法截取像素: {e}")
+            return [False] * len(checks)
+        if sampled is None:
+            return [False] * len(checks)
+        pixels, inside = sampled
+        distances = ((pixels - targets) ** 2).sum(axis=1)
+        return (inside & (distances < thresholds ** 2)).tolist()
+
+    def wait_for_pixels(self, checks, timeout=10, interval=None, require_all=True):
+        """
+        等待一组像素颜色匹配 (每次检查只截一次图，见 probe_pixels)。
+        :param checks: 同 probe_pixels
+        :param timeout: 超时时间（秒）
+        :param interval: 最长检查间隔（秒），缺省使用 poller.max_interval
+        :param require_all: True 表示全部匹配才算成功，False 表示任意一个匹配即可
+        :return: 是否匹配成功
+        """
+        combine = all if require_all else any
+        return bool(self.poller.wait(lambda: combine(self.probe_pixels(checks)), timeout=timeout, max_interval=interval))
+
+    def wait_for_pixel_color(self, x, y, target_color, timeout=10, interval=None, threshold=15):
         """
         等待指定坐标的像素颜色匹配目标颜色。
+        基于 probe_pixels，每次检查只截取该像素；读取单个像素很廉价，因此从 poller 的最短间隔开始检查，颜色一直不匹配时逐渐放慢到 interval。
         :param x: X坐标
         :param y: Y坐标
         :param target_color: 目标颜色 (格式: "#RRGGBB")
         :param timeout: 超时时间（秒）
-        :param interval: 检查间隔（秒）
+        :param interval: 最长检查间隔（秒），缺省使用 poller.max_interval
         :param threshold: 颜色相似度阈值
         :return: 是否匹配成功
         """
         print(f"[Controls] 等待像素颜色 at ({x}, {y}) 变为 {target_color} (超时: {timeout}s)")
-        start_time = time.time()
-        while True:
-            current_color = self.get_pixel_color(x, y)
-            if current_color and self.is_similar_color(target_color, current_color, threshold):
-                print(f"[Controls] 像素颜色匹配成功 at ({x}, {y})")
-                return True
-            if time.time() - start_time > timeout:
-                print(f"[Controls] 超时: {timeout}秒内像素颜色未匹配 at ({x}, {y})")
-                return False
-            time.sleep(interval)
+        if self.wait_for_pixels([(x, y, target_color, threshold)], timeout=timeout, interval=interval):
+            print(f"[Controls] 像素颜色匹配成功 at ({x}, {y})")
+            return True
+        print(f"[Controls] 超时: {timeout}秒内像素颜色未匹配 at ({x}, {y})")
+        return False
 
 # --- 测试代码 ---
 if __name__ == '__main__':
@@ -0,0 +1,93 @@
+import cv2
+import numpy as np
+
+from .template_cache import resident_nbytes
+
+
+class ExactIndex:
+    """
+    像素完全一致的模板 (静态界面的标签、图标、角标) 的快速查找，不做归一化相关。
+    - 只扫描画面中每隔 stride 行的一行: 模板高度为 h 时，任意摆放位置覆盖的 h 行中都有被扫描的行
+      (单色行在界面中到处都是，不作为索引，stride 相应缩小，保证每个位置仍能被索引行覆盖)
+    - 被扫描的行转为灰度，用 boxFilter 求出每个窗口的灰度和，与模板各行的灰度和查表得到候选
+    - 候选再比较模板行上的若干采样像素 (稀疏像素签名)，剩下的才对整块 BGR 像素做相等比较
+    """
+
+    SAMPLES = 8 # 每行的采样像素数
+
+    def __init__(self, template, max_candidates=2000):
+        """
+        :param template: BGR 模板
+        :param max_candidates: 通过签名检查后最多逐个验证的候选数，超出时返回 None，由调用方回退到相关匹配
+        """
+        self.template = np.ascontiguousarray(template)
+        self.height, self.width = template.shape[:2]
+        self.max_candidates = max_candidates
+        gray = cv2.cvtColor(self.template, cv2.COLOR_BGR2GRAY)
+        distinct = [r for r in range(self.height) if np.any(self.template[r] != self.template[r, 0])]
+        self.stride = self._stride(distinct)
+        self._rows = np.array(distinct, dtype=np.int64)
+        sums = gray[distinct].sum(axis=1, dtype=np.int64) if distinct else np.zeros(0, dtype=np.int64)
+        # 灰度和 -> 分组号 (-1 表示没有索引行是这个灰度和)；同一分组内是灰度和相同的索引行，按 -1 补齐
+        values, groups = np.unique(sums, return_inverse=True)
+        self._lut = np.full(255 * self.width + 1, -1, dtype=np.int32)
+        self._lut[values] = np.arange(len(values), dtype=np.int32)
+        members = [np.flatnonzero(groups == g) for g in range(len(values))]
+        self._groups = np.full((len(values), max((len(m) for m in members), default=0)), -1, dtype=np.int64)
+        for g, m in enumerate(members):
+            self._groups[g, :len(m)] = m
+        self._offsets = np.unique(np.linspace(0, self.width - 1, self.SAMPLES).astype(np.int64))
+        self._signatures = gray[distinct][:, self._offsets] if distinct else np.zeros((0, len(self._offsets)))
+
+    def _stride(self, distinct):
+        """每种 y0 % stride 都至少有一个索引行落在被扫描的行上时的最大 stride；没有可索引的行时为 0。"""
+        for stride in range(self.height, 0, -1):
+            if len({r % stride for r in distinct}) == stride:
+                return stride
+        return 0
+
+    @property
+    def nbytes(self):
+        """索引占用的字节数 (供 TemplateCache 统计)；模板来自图集映射时不计模板本身。"""
+        return resident_nbytes(self.template) + self._lut.nbytes + self._groups.nbytes + self._signatures.nbytes
+
+    @property
+    def usable(self):
+        """模板全部由单色行组成时无法建立索引。"""
+        return self.stride > 0
+
+    def find_all(self, image):
+        """
+        返回模板在 image 中所有完全一致的位置 [(x, y), ...] (先按行、再按列排序)；
+        候选过多时返回 None，表示应改用相关匹配。
+        """
+        image_h, image_w = image.shape[:2]
+        if not self.usable or image_h < self.height or image_w < self.width:
+            return []
+        first = self.stride - 1
+        gray = cv2.cvtColor(image[first::self.stride], cv2.COLOR_BGR2GRAY)
+        windows = image_w - self.width + 1
+        sums = cv2.boxFilter(gray, cv2.CV_32F, (self.width, 1), anchor=(0, 0), normalize=False,
+                             borderType=cv2.BORDER_CONSTANT)[:, :windows]
+        group = self._lut[sums.astype(np.int64)]
+        ys, xs = np.nonzero(group >= 0)
+        if len(ys) == 0:
+            return []
+
+        # 候选 × 该灰度和对应的索引行 (通常只有一行)，逐一比较采样像素
+        members = self._groups[group[ys, xs]]
+        pairs_c, pairs_k = np.nonzero(members >= 0)
+        ys, xs, rows = ys[pairs_c], xs[pairs_c], members[pairs_c, pairs_k]
+        samples = gray[ys[:, None], xs[:, None] + self._offsets[None, :]]
+        keep = np.all(samples == self._signatures[rows], axis=1)
+        ys, xs, rows = ys[keep], xs[keep], rows[keep]
+        tops = first + ys * self.stride - self._rows[rows]
+        valid = (tops >= 0) & (tops <= image_h - self.height)
+        if np.count_nonzero(valid) > self.max_candidates:
+            return None
+
+        found = set()
+        for x, top in zip(xs[valid].tolist(), tops[valid].tolist()):
+            if (x, top) not in found and np.array_equal(image[top:top + self.height, x:x + self.width], self.template):
+                found.add((x, top))
+        return sorted(found, key=lambda loc: (loc[1], loc[0]))
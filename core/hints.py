@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+
+
+class LocationHints:
+    """
+    记录每个模板最近被找到的位置 ("热点")，并在两次运行之间持久化到磁盘。
+    Vision 整屏查找时先只搜索热点周围的小区域，未命中才回退整屏搜索。
+    热点按截图范围尺寸分别保存，窗口尺寸变化后不会误用旧位置。
+    """
+
+    def __init__(self, path="data/template_hints.json", padding=32, max_spots=3, save_interval=30.0):
+        """
+        :param path: 持久化文件路径 (JSON)，为空时只保存在内存中
+        :param padding: 搜索热点时向四周扩展的像素
+        :param max_spots: 每个模板保留的热点数
+        :param save_interval: 有新记录时两次自动保存之间的最短间隔 (秒)
+        """
+        self.path = path
+        self.padding = padding
+        self.max_spots = max_spots
+        self.save_interval = save_interval
+        self._spots = {} # "宽x高" -> 模板路径 -> [{"bbox": [l, t, w, h], "hits": n, "last": 时间戳}]
+        self._stats = {} # 模板路径 -> {"hint": 热点命中, "fallback": 回退整屏, "cold": 尚无热点}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.load()
+
+    @staticmethod
+    def _bounds_key(bounds):
+        return f"{bounds['width']}x{bounds['height']}"
+
+    def load(self):
+        """从磁盘读取热点；文件不存在或损坏时从空白开始。"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._spots = data
+        except (OSError, ValueError) as e:
+            print(f"[Hints] 读取位置提示失败，将重新学习: {e}")
+
+    def save(self):
+        """把热点写回磁盘 (先写临时文件再替换，避免中途退出留下半个文件)。"""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._spots, indent=2, ensure_ascii=False)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[Hints] 保存位置提示失败: {e}")
+
+    def regions(self, template, bounds):
+        """
+        返回模板热点扩展 padding 后的搜索区域列表 (相对截图范围，命中多的在前)；没有热点时返回空列表。
+        :param bounds: 当前截图范围 (Screen.monitor)
+        """
+        with self._lock:
+            spots = self._spots.get(self._bounds_key(bounds), {}).get(template, [])
+            spots = sorted(spots, key=lambda s: s["hits"], reverse=True)
+        pad = self.padding
+        return [(left - pad, top - pad, width + 2 * pad, height + 2 * pad)
+                for left, top, width, height in (s["bbox"] for s in spots)]
+
+    def record_hit(self, template, bbox, bounds):
+        """记录一次命中位置: 与已有热点重合时累加计数，否则新增热点 (超出上限时淘汰命中最少的)。"""
+        left, top, width, height = (int(v) for v in bbox)
+        now = time.time()
+        with self._lock:
+            spots = self._spots.setdefault(self._bounds_key(bounds), {}).setdefault(template, [])
+            for spot in spots:
+                s_left, s_top = spot["bbox"][:2]
+                if abs(s_left - left) <= self.padding and abs(s_top - top) <= self.padding:
+                    spot["bbox"] = [left, top, width, height]
+                    spot["hits"] += 1
+                    spot["last"] = now
+                    break
+            else:
+                spots.append({"bbox": [left, top, width, height], "hits": 1, "last": now})
+                if len(spots) > self.max_spots:
+                    spots.remove(min(spots, key=lambda s: (s["hits"], s["last"])))
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def record_lookup(self, template, outcome):
+        """
+        统计一次整屏查找走的路径。
+        :param outcome: "hint" (热点内找到)、"fallback" (热点未命中，回退整屏) 或 "cold" (尚无热点)
+        """
+        with self._lock:
+            stats = self._stats.setdefault(template, {"hint": 0, "fallback": 0, "cold": 0})
+            stats[outcome] += 1
+
+    def stats(self):
+        """返回每个模板的查找统计的副本。"""
+        with self._lock:
+            return {template: dict(counts) for template, counts in self._stats.items()}
+
+    def report(self):
+        """汇总热点命中率，便于评估节省了多少整屏搜索。"""
+        stats = self.stats()
+        hint = sum(s["hint"] for s in stats.values())
+        fallback = sum(s["fallback"] for s in stats.values())
+        cold = sum(s["cold"] for s in stats.values())
+        total = hint + fallback + cold
+        if total == 0:
+            return "[Hints] 尚无整屏查找记录"
+        lines = [f"[Hints] 整屏查找 {total} 次: 热点命中 {hint} 次 ({hint * 100 / total:.1f}%)，"
+                 f"回退整屏 {fallback} 次，无热点 {cold} 次"]
+        for template, s in sorted(stats.items()):
+            lines.append(f"  {os.path.basename(template)}: 命中 {s['hint']} / 回退 {s['fallback']} / 无热点 {s['cold']}")
+        return "\n".join(lines)
+
+    def close(self):
+        """有未保存的记录时写回磁盘。"""
+        if self._dirty:
+            self.save()
@@ -0,0 +1,91 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class AdaptivePoller:
+    """
+    自适应轮询: 立即检查一次，之后只在画面发生变化时才重新执行昂贵的检查 (如模板匹配)。
+    - signal(): 返回画面的廉价缩略图，与上一次相比有明显差异时视为画面变化
+    - 画面变化后立即以 min_interval 检查；画面静止时间隔按 backoff 倍数增长到 max_interval
+    - 为防止缩略图漏掉极小的变化，距上次检查超过 max_idle 秒时无论如何都检查一次
+    未提供 signal 时每轮都检查，间隔从 min_interval 按 backoff 增长。
+    """
+
+    def __init__(self, min_interval=0.05, max_interval=0.5, backoff=1.5, change_threshold=12, max_idle=2.0):
+        """
+        :param min_interval: 最短轮询间隔 (秒)
+        :param max_interval: 最长轮询间隔 (秒)
+        :param backoff: 画面静止时间隔的增长倍数
+        :param change_threshold: 缩略图像素差的最大值超过该值时视为画面变化 (0~255)
+        :param max_idle: 画面静止时两次检查之间的最长间隔 (秒)
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.change_threshold = change_threshold
+        self.max_idle = max_idle
+
+    @staticmethod
+    def thumbnail(image, factor=8):
+        """把图像缩小 factor 倍作为变化检测信号 (INTER_AREA 会平均掉噪点)。"""
+        if image is None:
+            return None
+        h, w = image.shape[:2]
+        size = (max(w // factor, 1), max(h // factor, 1))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def changed(self, previous, current):
+        """比较两次信号 (缩略图，或缩略图组成的列表)。"""
+        if previous is None or current is None:
+            return True
+        if isinstance(current, (list, tuple)):
+            if not isinstance(previous, (list, tuple)) or len(previous) != len(current):
+                return True
+            return any(self.changed(p, c) for p, c in zip(previous, current))
+        if previous.shape != current.shape:
+            return True
+        return int(np.max(cv2.absdiff(previous, current))) > self.change_threshold
+
+    def wait(self, check, signal=None, timeout=10, max_interval=None):
+        """
+        轮询直到 check() 返回真值或超时。
+        :param check: 检查函数，返回真值时结束等待
+        :param signal: 可选的变化检测函数，返回缩略图
+        :param timeout: 超时时间 (秒)
+        :param max_interval: 本次等待的最长间隔，缺省使用 self.max_interval
+        :return: check() 的真值结果，超时返回 None
+        """
+        max_interval = self.max_interval if max_interval is None else max_interval
+        min_interval = min(self.min_interval, max_interval)
+        deadline = time.monotonic() + timeout
+        # 基准信号在第一次检查之前取得，检查复用同一帧 (见 Vision 的帧缓存)；
+        # 否则检查期间出现的变化会被计入基准，直到 max_idle 才会再检查
+        last_signal = signal() if signal is not None else None
+        result = check()
+        if result:
+            return result
+        last_check = time.monotonic()
+        interval = min_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(interval, remaining))
+
+            changed = True
+            if signal is not None:
+                current = signal()
+                changed = self.changed(last_signal, current)
+                last_signal = current
+            now = time.monotonic()
+            if changed or now - last_check >= self.max_idle:
+                result = check()
+                last_check = time.monotonic()
+                if result:
+                    return result
+            if signal is not None and changed:
+                interval = min_interval
+            else:
+                interval = min(interval * self.backoff, max_interval)
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+
+class HistogramPrefilter:
+    """
+    颜色直方图预筛选: 在 matchTemplate 之前排除不可能包含模板的画面 (或搜索区域)。
+    模板出现在画面中时，画面每个颜色区间的像素数都不少于模板的像素数；
+    因此按区间取 min(模板, 画面) 求和，占模板像素总数的比例 (覆盖率) 低于 min_coverage 时可以直接判定未找到。
+    等待模板时大多数轮询都是未命中，预筛选只需一次直方图 (整屏约几毫秒)，远低于一次完整的匹配。
+    """
+
+    def __init__(self, bins=4, min_coverage=0.8):
+        """
+        :param bins: 每个颜色通道的区间数 (共 bins³ 个区间)，越多越严格，但也越容易因颜色轻微偏差误判
+        :param min_coverage: 最低覆盖率 (0~1)，考虑缩放插值、压缩噪声造成的颜色偏差，不宜设为 1
+        """
+        self.bins = bins
+        self.min_coverage = min_coverage
+        self.checks = 0
+        self.skips = 0
+        self.skips_by_template = {} # 模板路径 -> 被跳过的次数
+
+    def histogram(self, image):
+        """BGR 图像的颜色直方图 (各区间的像素数)。"""
+        return cv2.calcHist([image], [0, 1, 2], None, [self.bins] * 3, [0, 256] * 3)
+
+    def coverage(self, template_hist, frame_hist):
+        """画面直方图能容纳模板直方图的比例。"""
+        total = float(template_hist.sum())
+        if total <= 0:
+            return 1.0
+        return float(np.minimum(template_hist, frame_hist).sum()) / total
+
+    def may_contain(self, template_path, template_hist, frame_hist):
+        """
+        画面是否可能包含模板；不可能时计入跳过次数。
+        :return: False 表示可以跳过 matchTemplate
+        """
+        self.checks += 1
+        if self.coverage(template_hist, frame_hist) >= self.min_coverage:
+            return True
+        self.skips += 1
+        self.skips_by_template[template_path] = self.skips_by_template.get(template_path, 0) + 1
+        return False
+
+    def stats(self):
+        """返回预筛选计数: 检查次数、跳过次数、跳过比例和跳过最多的模板。"""
+        top = sorted(self.skips_by_template.items(), key=lambda item: item[1], reverse=True)[:5]
+        return {
+            "checks": self.checks,
+            "skips": self.skips,
+            "skip_ratio": self.skips / self.checks if self.checks else 0.0,
+            "top_skipped": top,
+        }
@@ -0,0 +1,114 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class FlightRecorder:
+    """
+    低开销的“黑匣子”: 在内存中保留最近 N 帧缩略图、Vision 匹配结果和 Controls 操作。
+    记录时只做一次缩放 (且按最小间隔限流)；任务失败时调用 dump()，
+    由后台线程负责 PNG 编码和写盘，轮询循环不会因压缩而阻塞。
+    """
+
+    def __init__(self, capacity=60, scale=0.25, min_frame_interval=0.5, output_dir="logs/flight"):
+        """
+        :param capacity: 保留的帧数 (事件保留 capacity * 4 条)
+        :param scale: 帧缩放比例
+        :param min_frame_interval: 两次记录帧之间的最短间隔 (秒)
+        :param output_dir: dump() 输出目录
+        """
+        self.scale = scale
+        self.min_frame_interval = min_frame_interval
+        self.output_dir = output_dir
+        self._frames = deque(maxlen=capacity)
+        self._events = deque(maxlen=capacity * 4)
+        self._lock = threading.Lock()
+        self._last_frame_at = 0.0
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    def record_frame(self, image, offset=(0, 0)):
+        """
+        记录一帧缩略图 (距上一帧不足 min_frame_interval 时直接返回)。
+        :param image: BGR 图像 (整屏或区域)
+        :param offset: 该图像左上角相对截图范围的偏移
+        """
+        now = time.time()
+        if image is None or now - self._last_frame_at < self.min_frame_interval:
+            return
+        self._last_frame_at = now
+        # resize 会生成新数组，因此复用缓冲区里的帧被覆盖也不影响记录
+        small = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        with self._lock:
+            self._frames.append((now, tuple(offset), small))
+
+    def record_match(self, template, score, coords, region=None):
+        """记录一次模板匹配的结果 (包括未达到阈值的最高分)。"""
+        self._add_event("match", template=template, score=round(float(score), 4),
+                        coords=coords, region=region)
+
+    def record_action(self, action, **details):
+        """记录一次鼠标/键盘操作。"""
+        self._add_event("action", action=action, **details)
+
+    def _add_event(self, kind, **data):
+        with self._lock:
+            self._events.append({"time": time.time(), "kind": kind, **data})
+
+    def dump(self, reason):
+        """
+        把当前内存中的记录交给后台线程写盘，立即返回输出目录。
+        :param reason: 触发原因 (如任务名)，会出现在目录名和 timeline.json 中
+        """
+        with self._lock:
+            frames = list(self._frames)
+            events = list(self._events)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        safe_reason = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(reason))
+        target = os.path.join(self.output_dir, f"{stamp}_{safe_reason}")
+        self._ensure_worker()
+        self._jobs.put((target, reason, frames, events))
+        print(f"[Recorder] 正在后台保存最近 {len(frames)} 帧和 {len(events)} 条事件到 {target}")
+        return target
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name="FlightRecorder", daemon=True)
+            self._thread.start()
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                return
+            try:
+                self._write(*job)
+            except Exception as e:
+                print(f"[Recorder] 保存记录失败: {e}")
+            finally:
+                self._jobs.task_done()
+
+    def _write(self, target, reason, frames, events):
+        os.makedirs(target, exist_ok=True)
+        frame_index = []
+        for i, (ts, offset, image) in enumerate(frames):
+            name = f"frame_{i:03d}.png"
+            cv2.imwrite(os.path.join(target, name), image)
+            frame_index.append({"time": ts, "file": name, "offset": offset, "scale": self.scale})
+        timeline = {"reason": reason, "dumped_at": time.time(), "frames": frame_index, "events": events}
+        with open(os.path.join(target, "timeline.json"), "w", encoding="utf-8") as f:
+            json.dump(timeline, f, indent=2, ensure_ascii=False, default=str)
+        print(f"[Recorder] 记录已保存: {target}")
+
+    def close(self, timeout=10.0):
+        """等待未完成的写盘任务 (最多 timeout 秒) 并停止后台线程。"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._jobs.put(None)
+        self._thread.join(timeout=timeout)
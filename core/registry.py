@@ -0,0 +1,105 @@
+import os
+from typing import NamedTuple, Optional, Tuple
+
+from .vision import MATCH_MODES
+
+try:
+    import yaml  # type: ignore
+except Exception:
+    yaml = None  # 延迟错误，首次使用时报错提示安装 pyyaml
+
+
+class TemplateSpec(NamedTuple):
+    """模板清单中的一项。"""
+    group: str  # 所属任务分组，如 "arena"
+    name: str  # 逻辑名，如 "victory"
+    path: str  # 模板路径，如 "templates/victory.png"
+    region: Optional[Tuple[int, int, int, int]] = None  # 默认搜索区域，None 表示整个截图范围
+    confidence: Optional[float] = None  # 默认相似度阈值，None 表示使用 Vision 的默认值
+    scale: float = 1.0  # 加载模板时的缩放比例
+    mode: Optional[str] = None  # 匹配模式 (见 core.vision.MATCH_MODES)，None 表示使用 Vision 的默认模式
+
+
+class TemplateRegistry:
+    """
+    集中管理各任务需要的模板 (templates/manifest.yaml)。
+    任务按逻辑名取得模板路径；Vision 按路径取得默认的搜索区域、相似度和缩放；
+    DoroBot 启动时用 validate() 找出缺失的模板文件，避免任务在等待不存在的模板时耗尽超时。
+    """
+
+    def __init__(self, manifest_path="templates/manifest.yaml", template_dir="templates"):
+        """
+        :param manifest_path: 模板清单路径
+        :param template_dir: 清单中文件路径的基准目录
+        """
+        self.manifest_path = manifest_path
+        self.template_dir = template_dir
+        self._groups = {} # 分组 -> 逻辑名 -> TemplateSpec
+        self._by_path = {} # 规范化路径 -> TemplateSpec
+        self._missing = {} # 分组 -> 缺失的逻辑名列表 (validate 之后可用)
+        self.load()
+
+    def load(self):
+        """读取模板清单；清单不存在时注册表为空。"""
+        if not os.path.exists(self.manifest_path):
+            print(f"[Templates] 警告: 模板清单不存在 {self.manifest_path}")
+            return
+        if yaml is None:
+            raise RuntimeError("Missing dependency: pyyaml. Please install pyyaml to use the template manifest.")
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        self._groups.clear()
+        self._by_path.clear()
+        for group, entries in data.items():
+            specs = {}
+            for name, entry in (entries or {}).items():
+                if isinstance(entry, str):
+                    entry = {"file": entry}
+                region = entry.get("region")
+                mode = entry.get("mode")
+                if mode is not None and mode not in MATCH_MODES:
+                    print(f"[Templates] 警告: {group}.{name} 的匹配模式 '{mode}' 无效，改用默认模式")
+                    mode = None
+                spec = TemplateSpec(
+                    group=group,
+                    name=name,
+                    path=f"{self.template_dir}/{entry.get('file', name + '.png')}",
+                    region=tuple(region) if region else None,
+                    confidence=entry.get("confidence"),
+                    scale=entry.get("scale", 1.0),
+                    mode=mode,
+                )
+                specs[name] = spec
+                self._by_path[os.path.normpath(spec.path)] = spec
+            self._groups[group] = specs
+
+    def group(self, group):
+        """返回分组内 逻辑名 -> 模板路径 的字典 (与任务原先的 *_images 字典相同)。"""
+        return {name: spec.path for name, spec in self._groups.get(group, {}).items()}
+
+    def spec(self, template_path):
+        """按路径查找清单项；不在清单中时返回 None。"""
+        return self._by_path.get(os.path.normpath(template_path))
+
+    def validate(self, atlas=None):
+        """
+        检查清单中的模板是否都能加载 (源文件存在，或已编译进图集)。
+        :param atlas: 可选的 TemplateAtlas
+        :return: 分组 -> 缺失的逻辑名列表 (只包含有缺失的分组)
+        """
+        self._missing = {}
+        for group, specs in self._groups.items():
+            missing = [name for name, spec in specs.items()
+                       if not os.path.isfile(spec.path) and not (atlas is not None and spec.path in atlas)]
+            if missing:
+                self._missing[group] = missing
+        return dict(self._missing)
+
+    def missing(self, group):
+        """上次 validate() 时该分组缺失的逻辑名。"""
+        return list(self._missing.get(group, []))
+
+    def all_missing(self, group):
+        """该分组的模板全部缺失 (分组存在且至少有一个模板)。"""
+        specs = self._groups.get(group, {})
+        return bool(specs) and len(self._missing.get(group, [])) == len(specs)
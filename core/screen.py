@@ -1,38 +1,457 @@
-import mss
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
 import numpy as np
 import cv2
 
+from .backends import MssBackend
+
+
+def normalize_region(region):
+    """
+    将区域参数统一为 (left, top, width, height) 元组。
+    :param region: (left, top, width, height) 序列，或 mss 风格的 {'left','top','width','height'} 字典
+    """
+    if isinstance(region, dict):
+        return (int(region['left']), int(region['top']), int(region['width']), int(region['height']))
+    left, top, width, height = region
+    return (int(left), int(top), int(width), int(height))
+
+
+def readonly(array):
+    """返回数组的只读视图 (不复制像素)。"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def is_region_list(region):
+    """判断 region 参数是单个区域还是多个区域组成的列表。"""
+    if region is None or isinstance(region, dict):
+        return False
+    return len(region) > 0 and isinstance(region[0], (tuple, list, dict))
+
+
 class Screen:
-    def __init__(self, monitor_number=1):
+    def __init__(self, monitor_number=1, reuse_buffers=False, backend=None, display_check_interval=10.0):
         """
         初始化截图器。
         :param monitor_number: 要截取的显示器编号 (1 通常是主显示器)
+        :param reuse_buffers: 是否复用预分配的 BGR 输出缓冲区 (见 capture 的帧生命周期说明)
+        :param backend: 截图后端 (core.backends.CaptureBackend)，默认使用 mss 实时截图
+        :param display_check_interval: 重新枚举显示器 (检测分辨率/系统缩放变化) 的最短间隔 (秒)，0 表示不检查；
+            mss 后端每次检查都要新建一个实例 (Linux 下是一个新的 X 连接)，不宜过于频繁
         """
+        self.reuse_buffers = reuse_buffers
+        # 按 ((height, width, channels), slot) 缓存的输出缓冲区
+        self._buffers = {}
+        # 可选的游戏窗口 (core.window.GameWindow)，设置后截图范围限定在窗口内
+        self.window = None
+        self._bounds_listeners = []
+        self.monitor_number = monitor_number
+        self.display_check_interval = display_check_interval
+        self._display_checked_at = time.monotonic()
         try:
-            # 初始化 mss，并立即获取显示器信息
-            # 我们将 mss 实例保存在类中，以便将来可能重用
-            self.sct = mss.mss()
-            self.monitor = self.sct.monitors[monitor_number]
-            print(f"[Screen] 已初始化，将截取显示器 {monitor_number}: {self.monitor}")
+            # 初始化截图后端，并立即获取显示器信息
+            # 我们将后端实例保存在类中，以便重用
+            self.backend = backend if backend is not None else MssBackend()
+            # display 是整个显示器；monitor 是当前截图范围 (显示器或游戏窗口)，所有相对坐标都以它为基准
+            self.display = self.backend.monitors[monitor_number]
+            self.monitor = self.display
+            print(f"[Screen] 已初始化 ({self.backend.name})，将截取显示器 {monitor_number}: {self.monitor}")
         except Exception as e:
-            print(f"[Screen] 严重错误: 无法初始化 mss 或找到显示器 {monitor_number}。")
+            print(f"[Screen] 严重错误: 无法初始化截图后端或找到显示器 {monitor_number}。")
             print("错误详情:", e)
-            print("可用的显示器:", self.sct.monitors if hasattr(self, 'sct') else "mss 未能加载")
+            print("可用的显示器:", self.backend.monitors if hasattr(self, 'backend') else "截图后端未能加载")
             # 在这种严重错误下，我们应该退出
             raise
 
-    def capture(self):
+    @property
+    def origin(self):
+        """当前截图范围左上角的屏幕绝对坐标。"""
+        return (self.monitor['left'], self.monitor['top'])
+
+    def to_absolute(self, x, y):
+        """把相对截图范围的坐标换算为屏幕绝对坐标 (供 Controls 点击使用)。"""
+        return (self.monitor['left'] + x, self.monitor['top'] + y)
+
+    def add_bounds_listener(self, callback):
+        """订阅截图范围变化，回调参数为新的 monitor 字典。"""
+        self._bounds_listeners.append(callback)
+
+    def set_bounds(self, rect):
+        """
+        把截图范围限定为屏幕绝对坐标下的矩形 (left, top, width, height)。
+        """
+        left, top, width, height = normalize_region(rect)
+        bounds = {'left': left, 'top': top, 'width': width, 'height': height}
+        if bounds == self.monitor:
+            return
+        self.monitor = bounds
+        self._notify_bounds()
+
+    def _notify_bounds(self):
+        for callback in list(self._bounds_listeners):
+            try:
+                callback(self.monitor)
+            except Exception as e:
+                print(f"[Screen] 截图范围回调出错: {e}")
+
+    def reset_bounds(self):
+        """恢复为截取整个显示器。"""
+        self.set_bounds(self.display)
+
+    @contextmanager
+    def unbounded(self):
+        """临时截取整个显示器 (不通知订阅者)，用于在窗口外寻找游戏窗口。"""
+        bounds = self.monitor
+        self.monitor = self.display
+        try:
+            yield self
+        finally:
+            self.monitor = bounds
+
+    def attach_window(self, window):
+        """
+        绑定游戏窗口: 立即定位一次，之后截图范围和相对坐标都以窗口为基准。
+        :param window: core.window.GameWindow 实例；None 表示解除绑定
+        :return: 是否找到了窗口
+        """
+        self.window = window
+        if window is None:
+            self.reset_bounds()
+            return False
+        return self.refresh_window(force=True)
+
+    def refresh_display(self, force=False):
+        """
+        按 display_check_interval 重新枚举显示器，分辨率或系统缩放变化后更新 display。
+        未绑定窗口 (截取整个显示器) 时截图范围跟随新的显示器；否则截图范围不变，
+        但仍通知订阅者，依赖显示器配置的结果 (如缩放校准) 需要重新检查。
+        :return: 显示器配置是否发生了变化
+        """
+        now = time.monotonic()
+        if not force and (self.display_check_interval <= 0
+                          or now - self._display_checked_at < self.display_check_interval):
+            return False
+        self._display_checked_at = now
+        try:
+            monitors = self.backend.refresh_monitors()
+        except Exception as e:
+            print(f"[Screen] 重新枚举显示器失败: {e}")
+            return False
+        if self.monitor_number >= len(monitors) or dict(monitors[self.monitor_number]) == self.display:
+            return False
+        previous, self.display = self.display, dict(monitors[self.monitor_number])
+        print(f"[Screen] 显示器 {self.monitor_number} 配置已变化: {previous} -> {self.display}")
+        if self.window is None and self.monitor == previous:
+            self.set_bounds(self.display)
+        else:
+            self._notify_bounds()
+        return True
+
+    def refresh_window(self, force=False):
+        """
+        按窗口的重新校验间隔检查窗口位置，移动或缩放后更新截图范围 (同时按间隔检查显示器配置)。
+        :return: 当前是否有有效的窗口区域
+        """
+        self.refresh_display()
+        if self.window is None:
+            return False
+        rect = self.window.validate(self, force)
+        if rect is None:
+            return False
+        self.set_bounds(rect)
+        return True
+
+    def clip_region(self, region, relative=True):
+        """
+        将区域裁剪到当前截图范围 (显示器或游戏窗口) 内，并转换为相对其左上角的坐标。
+        :param region: (left, top, width, height) 或 mss 风格字典
+        :param relative: True 表示 region 相对截图范围左上角；False 表示屏幕绝对坐标
+        :return: 相对坐标 (left, top, width, height)；与截图范围无交集时返回 None
+        """
+        left, top, width, height = normalize_region(region)
+        if not relative:
+            left -= self.monitor['left']
+            top -= self.monitor['top']
+        x1 = max(0, left)
+        y1 = max(0, top)
+        x2 = min(self.monitor['width'], left + width)
+        y2 = min(self.monitor['height'], top + height)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return (x1, y1, x2 - x1, y2 - y1)
+
+    def _grab_area(self, region, relative):
+        """将 region 换算为后端 grab() 使用的绝对区域字典；无交集时返回 None。"""
+        if region is None:
+            return self.monitor
+        rect = self.clip_region(region, relative)
+        if rect is None:
+            return None
+        left, top, width, height = rect
+        return {
+            'left': self.monitor['left'] + left,
+            'top': self.monitor['top'] + top,
+            'width': width,
+            'height': height,
+        }
+
+    def _buffer(self, shape, slot=0):
+        """取得指定形状 (及槽位) 的复用缓冲区，不存在时分配。"""
+        key = (shape, slot)
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._buffers[key] = buf
+        return buf
+
+    def capture(self, region=None, relative=True, color=True, out=None):
+        """
+        截取当前截图范围 (显示器或游戏窗口)，并返回 OpenCV (BGR) 格式的图像。
+        :param region: 可选的截取区域 (left, top, width, height)，只截取并转换该区域的像素
+        :param relative: region 是否相对截图范围左上角 (False 表示屏幕绝对坐标)
+        :param color: False 时跳过颜色转换，直接返回后端原始数据的只读视图 (mss 为 BGRA)
+        :param out: 可选的 (h, w, 3) uint8 数组，转换结果直接写入其中
+
+        帧生命周期:
+        - color=False: 返回的视图引用后端本次截图的原始缓冲区，可长期持有，不会被后续截图覆盖。
+        - reuse_buffers=True 且未传 out: 返回复用缓冲区的只读视图，
+          下一次同尺寸截图会覆盖其内容；需要长期保存时请自行 .copy()。
+        - 传入 out: 结果写入 out 并原样返回，生命周期由调用方管理。
+        - 其他情况: 每次返回新分配的数组 (与旧行为一致)。
         """
-        截取初始化时指定的显示器，并返回 OpenCV (BGR) 格式的图像。
+        grab_area = self._grab_area(region, relative)
+        if grab_area is None:
+            return None
+
+        # .grab() 是一个非常快的操作，返回后端缓冲区的视图 (mss 为 BGRA，回放源可能已是 BGR)
+        raw = self.backend.grab(grab_area)
+        if not color:
+            # 共享内存类后端的缓冲区会被下一次截图覆盖，此时复制一份以保持上述生命周期约定
+            return readonly(raw.copy() if self.backend.volatile else raw)
+
+        # 转换为 BGR (OpenCV的标准格式)
+        if out is None and self.reuse_buffers:
+            out = self._buffer((raw.shape[0], raw.shape[1], 3))
+            return readonly(self._to_bgr(raw, out))
+        return self._to_bgr(raw, out)
+
+    @staticmethod
+    def _to_bgr(raw, out=None):
+        """把后端数据转换为 BGR；给定 out 时写入其中，否则返回新数组。"""
+        if raw.shape[2] == 4:
+            if out is None:
+                return cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR)
+            return cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR, dst=out)
+        if out is None:
+            return raw.copy()
+        np.copyto(out, raw)
+        return out
+
+    def capture_regions(self, regions, relative=True):
+        """
+        一次调用截取多个区域。
+        :param regions: 区域列表，每项为 (left, top, width, height) 或 mss 风格字典
+        :param relative: 区域是否相对截图范围左上角
+        :return: 与 regions 一一对应的 (image, (left, top)) 列表，(left, top) 为裁剪后相对截图范围的偏移；
+                 与截图范围无交集的区域对应 (None, None)
+        复用缓冲区时每个区域占用独立槽位，同尺寸的区域不会互相覆盖。
         """
-        # .grab() 是一个非常快的操作
-        sct_img = self.sct.grab(self.monitor)
-        
-        # 将 BGRA 转换为 Numpy 数组
-        img = np.array(sct_img)
-        
-        # 将 BGRA 转换为 BGR (OpenCV的标准格式)
-        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        results = []
+        for i, region in enumerate(regions):
+            rect = self.clip_region(region, relative)
+            if rect is None:
+                results.append((None, None))
+                continue
+            if self.reuse_buffers:
+                out = self._buffer((rect[3], rect[2], 3), slot=i)
+                img = readonly(self.capture(rect, out=out))
+            else:
+                img = self.capture(rect)
+            results.append((img, (rect[0], rect[1])))
+        return results
+
+class Frame(NamedTuple):
+    """后台截图线程产出的一帧。"""
+    seq: int  # 递增的帧序号
+    timestamp: float  # time.monotonic() 时间戳
+    image: np.ndarray  # 只读 BGR 图像
+    slot: int  # 所在环形缓冲区槽位，用于 release()
+
+
+class CaptureService:
+    """
+    可选的后台截图服务。
+    在独立线程中以固定帧率截图 (线程内持有自己的 Screen/mss 实例，mss 不是线程安全的)，
+    并把最近 N 帧保存在预分配的环形缓冲区中，调用方按需读取“不早于 X 毫秒”的最新帧。
+
+    帧生命周期: acquire()/borrow() 返回的帧在 release() 之前不会被覆盖 (写线程会跳过被占用的槽位)；
+    latest() 返回的是复制出来的帧，可长期持有。
+    """
+
+    def __init__(self, monitor_number=1, fps=10.0, ring_size=4, screen_factory=None):
+        """
+        :param monitor_number: 要截取的显示器编号
+        :param fps: 截图帧率
+        :param ring_size: 环形缓冲区保存的帧数 (至少 2)
+        :param screen_factory: 可选，返回 Screen 实例的工厂函数；在截图线程内调用
+        """
+        self.monitor_number = monitor_number
+        self.fps = max(0.1, float(fps))
+        self.ring_size = max(2, int(ring_size))
+        self._screen_factory = screen_factory or (lambda: Screen(monitor_number))
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
+        # 每个槽位: buffer / seq (-1 表示无效或正在写入) / timestamp / pins (被读取方占用的次数)
+        self._slots = [{'buffer': None, 'seq': -1, 'timestamp': 0.0, 'pins': 0} for _ in range(self.ring_size)]
+        self._seq = 0
+        self._pending_bounds = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.error = None
+
+    def start(self):
+        """启动后台截图线程。"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="CaptureService", daemon=True)
+        self._thread.start()
+        print(f"[Screen] 后台截图已启动 (fps: {self.fps}, 缓冲帧数: {self.ring_size})")
+
+    def stop(self):
+        """停止后台截图线程。"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def set_bounds(self, bounds):
+        """
+        线程安全地更新截图范围 (屏幕绝对坐标的矩形或 monitor 字典)，在下一帧生效。
+        可直接作为 Screen.add_bounds_listener 的回调，让后台截图跟随游戏窗口。
+        """
+        with self._lock:
+            self._pending_bounds = bounds
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _pick_slot(self):
+        """选择一个未被占用的最旧槽位用于写入；全部被占用时返回 None。"""
+        free = [i for i, slot in enumerate(self._slots) if slot['pins'] == 0]
+        if not free:
+            return None
+        return min(free, key=lambda i: self._slots[i]['seq'])
+
+    def _loop(self):
+        try:
+            # mss 实例必须在使用它的线程中创建
+            screen = self._screen_factory()
+        except Exception as e:
+            self.error = e
+            print(f"[Screen] 后台截图线程初始化失败: {e}")
+            return
+        period = 1.0 / self.fps
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            with self._lock:
+                bounds, self._pending_bounds = self._pending_bounds, None
+                index = self._pick_slot()
+                if index is not None:
+                    slot = self._slots[index]
+                    slot['seq'] = -1  # 写入期间对读取方不可见
+            if bounds is not None:
+                screen.set_bounds(bounds)
+            if index is not None:
+                try:
+                    shape = (screen.monitor['height'], screen.monitor['width'], 3)
+                    if slot['buffer'] is None or slot['buffer'].shape != shape:
+                        slot['buffer'] = np.empty(shape, dtype=np.uint8)
+                    screen.capture(out=slot['buffer'])
+                    with self._lock:
+                        self._seq += 1
+                        slot['seq'] = self._seq
+                        slot['timestamp'] = time.monotonic()
+                        self._frame_ready.notify_all()
+                except Exception as e:
+                    self.error = e
+                    print(f"[Screen] 后台截图失败: {e}")
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay < 0:
+                # 截图跟不上设定帧率时，不累积欠账
+                next_time = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def _newest_index(self, max_age_ms):
+        best = None
+        for i, slot in enumerate(self._slots):
+            if slot['seq'] > 0 and (best is None or slot['seq'] > self._slots[best]['seq']):
+                best = i
+        if best is None:
+            return None
+        if max_age_ms is not None and (time.monotonic() - self._slots[best]['timestamp']) * 1000 > max_age_ms:
+            return None
+        return best
+
+    def acquire(self, max_age_ms=None):
+        """
+        取得最新一帧并占用其槽位，使用完毕后必须调用 release()。
+        :param max_age_ms: 允许的最大帧龄 (毫秒)；最新帧比它更旧时返回 None
+        """
+        with self._lock:
+            index = self._newest_index(max_age_ms)
+            if index is None:
+                return None
+            slot = self._slots[index]
+            slot['pins'] += 1
+            return Frame(slot['seq'], slot['timestamp'], readonly(slot['buffer']), index)
+
+    def release(self, frame):
+        """释放 acquire() 占用的槽位。"""
+        with self._lock:
+            slot = self._slots[frame.slot]
+            slot['pins'] = max(0, slot['pins'] - 1)
+
+    @contextmanager
+    def borrow(self, max_age_ms=None):
+        """with 语法包装 acquire()/release()；没有足够新的帧时得到 None。"""
+        frame = self.acquire(max_age_ms)
+        try:
+            yield frame
+        finally:
+            if frame is not None:
+                self.release(frame)
+
+    def latest(self, max_age_ms=None) -> Optional[Frame]:
+        """返回最新一帧的副本，可长期持有。"""
+        frame = self.acquire(max_age_ms)
+        if frame is None:
+            return None
+        try:
+            return frame._replace(image=frame.image.copy())
+        finally:
+            self.release(frame)
+
+    def wait_for_frame(self, after_seq=0, timeout=1.0):
+        """
+        阻塞等待序号大于 after_seq 的帧出现。
+        :return: 是否在超时前等到了新帧
+        """
+        deadline = time.monotonic() + timeout
+        with self._frame_ready:
+            while self._seq <= after_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._frame_ready.wait(remaining)
+            return True
 
 # --- 测试代码 ---
 if __name__ == '__main__':
@@ -40,11 +459,14 @@ if __name__ == '__main__':
     print("正在测试 Screen 类...")
     screen = Screen()
     time.sleep(1) # 暂停一下，让你看到初始化信息
-    
+
     img = screen.capture()
     print(f"截图成功，尺寸: {img.shape}")
-    
+
+    roi = screen.capture((0, 0, 200, 80))
+    print(f"区域截图成功，尺寸: {roi.shape}")
+
     cv2.imshow('Screen Test', cv2.resize(img, (960, 540)))
     print("按任意键退出测试...")
     cv2.waitKey(0)
-    cv2.destroyAllWindows()
\ No newline at end of file
+    cv2.destroyAllWindows()
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def resident_nbytes(array):
+    """
+    数组实际占用的进程内存字节数: 图集映射 (np.memmap) 上的视图由操作系统按需换入、可随时丢弃，记为 0。
+    """
+    base = array
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return 0
+        base = base.base
+    return array.nbytes
+
+
+class TemplateCache:
+    """
+    按字节数限制容量的 LRU 模板缓存。
+    - 超出 max_bytes 时淘汰最久未使用的模板 (图集映射的视图不占用进程内存，不计入)
+    - 加载失败的路径也会缓存 miss_ttl 秒，轮询缺失模板时不再反复访问磁盘和打印错误
+    - 提供命中/未命中/淘汰计数和当前占用字节数
+    - 线程安全 (Vision 并行匹配时线程池会同时读写金字塔缩小图)
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, miss_ttl=5.0):
+        """
+        :param max_bytes: 缓存模板像素的总字节数上限
+        :param miss_ttl: 加载失败结果的缓存时间 (秒)，0 表示不缓存失败
+        """
+        self._max_bytes = max_bytes
+        self.miss_ttl = miss_ttl
+        self._entries = OrderedDict() # key -> (value, nbytes)
+        self._missing = {} # key -> 失败结果过期时间 (time.monotonic())
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        """调低上限 (如配置热重载) 时立即淘汰超出的条目。"""
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    @staticmethod
+    def _nbytes(value):
+        """值中所有数组占用的进程内存字节数 (值可以是数组、带 nbytes 属性的对象，或包含它们的元组)。"""
+        if isinstance(value, np.ndarray):
+            return resident_nbytes(value)
+        if hasattr(value, "nbytes"):
+            return value.nbytes
+        if isinstance(value, tuple):
+            return sum(TemplateCache._nbytes(v) for v in value)
+        return 0
+
+    def _evict(self):
+        while self.resident_bytes > self._max_bytes and self._entries:
+            _key, (_value, evicted) = self._entries.popitem(last=False)
+            self.resident_bytes -= evicted
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        """取出缓存的值并标记为最近使用；没有缓存时返回 default。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def is_missing(self, key):
+        """该 key 最近加载失败过且仍在 miss_ttl 有效期内。"""
+        with self._lock:
+            expires = self._missing.get(key)
+            if expires is None:
+                return False
+            if time.monotonic() >= expires:
+                del self._missing[key]
+                return False
+            self.negative_hits += 1
+            return True
+
+    def put(self, key, value):
+        """缓存一个值，必要时淘汰最久未使用的条目。单个值超过上限时不缓存。"""
+        with self._lock:
+            nbytes = self._nbytes(value)
+            self._missing.pop(key, None)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.resident_bytes -= old[1]
+            if nbytes > self._max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.resident_bytes += nbytes
+            self._evict()
+
+    def put_missing(self, key):
+        """记录一次加载失败。"""
+        with self._lock:
+            if self.miss_ttl > 0:
+                self._missing[key] = time.monotonic() + self.miss_ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+            self.resident_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """返回缓存计数和占用情况。"""
+        return {
+            "entries": len(self._entries),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "evictions": self.evictions,
+        }
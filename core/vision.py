@@ -1,117 +1,979 @@
 import cv2
 import numpy as np
 import os
+import threading
 import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import NamedTuple, Optional, Tuple
+from .screen import is_region_list, readonly
+from .template_cache import TemplateCache
+from .poller import AdaptivePoller
+from .exact import ExactIndex
+
+try:
+    import xxhash  # type: ignore
+except Exception:
+    xxhash = None  # 见 requirements.txt；未安装时退回 zlib.crc32 计算画面内容哈希 (较慢)
+
+
+class Match(NamedTuple):
+    """find_any / wait_for_any / find_all_templates 的匹配结果。"""
+    template: str  # 命中的模板路径
+    score: float  # 相似度
+    coords: Tuple[float, float]  # 中心坐标 (相对截图范围)
+    bbox: Optional[Tuple[int, int, int, int]] = None  # 命中区域 (left, top, width, height)，相对截图范围
+
+class Blob(NamedTuple):
+    """find_color_blobs 的结果: 一块颜色相近的连通区域。"""
+    center: Tuple[float, float]  # 质心坐标 (相对截图范围)
+    bbox: Tuple[int, int, int, int]  # 外接矩形 (left, top, width, height)，相对截图范围
+    area: int  # 像素数
+
+MATCH_MODES = ("bgr", "gray", "b", "g", "r", "edge", "exact")
+PREFILTER_MODES = ("bgr", "exact") # 按颜色比较像素的模式，颜色直方图预筛选只用于这些模式
+_CHANNELS = {"b": 0, "g": 1, "r": 2}
+
+
+def convert_image(image, mode):
+    """
+    把 BGR 图像转换为匹配模式使用的图像。
+    - bgr: 原图 (3 通道)
+    - gray: 灰度 (单通道，按钮等界面元素通常靠亮度就能区分，匹配开销约为 bgr 的三分之一)
+    - b / g / r: 单个颜色通道 (按钮以某种颜色为主时比灰度更能区分)
+    - edge: 灰度的 Canny 边缘图 (对亮度/配色变化不敏感，得分通常较低，需要单独的阈值)
+    - exact: 原图，按像素完全一致查找 (见 ExactIndex)，找不到合适的候选时回退为 bgr 相关匹配
+    """
+    if mode in ("bgr", "exact"):
+        return image
+    if mode in _CHANNELS:
+        return cv2.extractChannel(image, _CHANNELS[mode])
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if mode == "edge":
+        return cv2.Canny(gray, 50, 150)
+    if mode == "gray":
+        return gray
+    raise ValueError(f"未知的匹配模式: {mode}")
+
+
+def pyramid_refine(screen, template, coarse, small_size, levels, confidence, margin=0.2, candidates=3):
+    """
+    金字塔匹配的细化步骤: 从粗匹配结果图中依次取出候选位置，在全分辨率画面的小窗口内重新匹配。
+    :param coarse: 缩小后的画面与缩小后的模板的匹配结果图 (会被修改)
+    :param small_size: 缩小后模板的 (高, 宽)
+    :param margin: 粗匹配得分比 confidence 低多少仍视为候选
+    :param candidates: 最多细化的候选数
+    :return: (最高相似度, 左上角位置)
+    """
+    template_h, template_w = template.shape[:2]
+    small_h, small_w = small_size
+    scale = 1 << levels
+    pad = scale * 2 # 细化窗口向四周扩展的像素，覆盖缩小带来的定位误差
+    best_val, best_loc = -1.0, (0, 0)
+    for _ in range(candidates):
+        _min_val, coarse_val, _min_loc, (cx, cy) = cv2.minMaxLoc(coarse)
+        if coarse_val < confidence - margin:
+            break
+        # 抑制该候选附近的位置，下一轮取下一个候选
+        coarse[max(cy - small_h // 2, 0):cy + small_h // 2 + 1, max(cx - small_w // 2, 0):cx + small_w // 2 + 1] = -1.0
+        left, top = max(cx * scale - pad, 0), max(cy * scale - pad, 0)
+        window = screen[top:top + template_h + 2 * pad, left:left + template_w + 2 * pad]
+        if window.shape[0] < template_h or window.shape[1] < template_w:
+            continue
+        result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _min_val, max_val, _min_loc, max_loc = cv2.minMaxLoc(result)
+        if max_val > best_val:
+            best_val, best_loc = max_val, (left + max_loc[0], top + max_loc[1])
+        if best_val >= confidence:
+            break
+    return best_val, best_loc
+
 
 class Vision:
-    def __init__(self, screen_instance, default_confidence=0.8):
+    def __init__(self, screen_instance, default_confidence=0.8, capture_service=None, max_frame_age_ms=200,
+                 frame_cache_ttl=0.0, pyramid_levels=0, template_cache_bytes=64 * 1024 * 1024,
+                 template_miss_ttl=5.0, poller=None, match_threads=0, default_mode="bgr", mode_confidence=None,
+                 memo_entries=256, memo_row_stride=4):
         """
         初始化视觉处理器。
         :param screen_instance: 一个已经实例化的 Screen 对象 (来自 core.screen)
         :param default_confidence: 默认的相似度阈值
+        :param capture_service: 可选的 CaptureService，设置后优先读取后台线程的最新帧
+        :param max_frame_age_ms: 使用后台帧时允许的最大帧龄 (毫秒)，超出则同步截图
+        :param frame_cache_ttl: 整屏帧缓存的有效期 (秒)，0 表示不缓存；snapshot() 作用域内始终复用同一帧
+        :param pyramid_levels: 金字塔匹配的缩小层数 (每层宽高减半)，0 表示始终全分辨率匹配
+        :param template_cache_bytes: 模板缓存 (含金字塔缩小图) 的字节数上限
+        :param template_miss_ttl: 模板加载失败的缓存时间 (秒)，期间不再重复读取和报错
+        :param poller: wait_for_* 使用的 AdaptivePoller，缺省使用默认参数
+        :param match_threads: 并行匹配的线程数 (cv2.matchTemplate 会释放 GIL)，0 或 1 表示在调用线程上依次匹配
+        :param default_mode: 模板清单未指定时使用的匹配模式 (见 MATCH_MODES)
+        :param mode_confidence: 各匹配模式的默认相似度阈值 (模式 -> 阈值)，未列出的模式使用 default_confidence
+        :param memo_entries: 匹配结果记忆的最大条目数，0 表示关闭 (区域像素未变化时直接返回上次的匹配结果)
+        :param memo_row_stride: 计算区域内容哈希时每隔几行取一行，1 表示哈希全部像素
+            (默认 4: 整屏哈希约为全部像素的四分之一耗时；界面变化通常远高于 4 行，只发生在被跳过的行里的变化会被忽略)
         """
         self.screen = screen_instance # 依赖注入
         self.default_confidence = default_confidence
-        self.template_cache = {} # (可选) 用于缓存已加载的模板
+        self.capture_service = capture_service
+        self.max_frame_age_ms = max_frame_age_ms
+        self.frame_cache_ttl = frame_cache_ttl
+        self.pyramid_levels = pyramid_levels
+        self.default_mode = default_mode
+        self.mode_confidence = dict(mode_confidence or {})
+        self.template_scale = 1.0 # 全局模板缩放比例，由 ScaleCalibrator 按分辨率/系统缩放校准
+        self.poller = poller or AdaptivePoller()
+        self.pyramid_margin = 0.2 # 粗匹配阈值比 confidence 低多少仍视为候选
+        self.pyramid_candidates = 3 # 每次粗匹配最多细化的候选数
+        self.match_threads = 0
+        self.min_tile_rows = 64 # 整屏匹配按行分块时每块至少包含的结果行数，画面太小时不分块
+        self._executor = None
+        self._executor_lock = threading.Lock() # 提交任务与替换线程池互斥，提交途中线程池不会被关闭
+        # 匹配结果记忆: (模板, 模式, 阈值, 金字塔层数, 缩放, 区域) -> (区域内容哈希, (相似度, 位置))
+        self.memo_entries = memo_entries
+        self.memo_row_stride = memo_row_stride
+        self._memo = OrderedDict()
+        self.memo_hits = 0
+        self.memo_misses = 0
+        # 帧缓存: 图像 / 缓存时间 / 来自后台截图服务时占用的 Frame (替换时释放)
+        self._cached_frame = None
+        self._cached_at = 0.0
+        self._cached_pin = None
+        self._handoff = False # 缓存的帧由变化检测截取，不论 frame_cache_ttl 都由下一次匹配复用一次
+        self._frame_buffer = None # 同步整屏截图写入的 Vision 私有缓冲区
+        self._snapshot_depth = 0
+        # 缓存帧的派生图，随缓存帧一起失效:
+        # (区域, 模式) -> 转换后的图像；(区域, 模式, 层数) -> 缩小图；(区域, "hist", 区间数) -> 颜色直方图
+        self._pyramid_cache = {}
+        self.recorder = None # 可选的 FlightRecorder
+        self.hints = None # 可选的 LocationHints
+        self.atlas = None # 可选的 TemplateAtlas
+        self.registry = None # 可选的 TemplateRegistry，提供各模板的默认区域/阈值/缩放
+        self.workers = None # 可选的 MatchWorkerPool，模板很多时把匹配分给工作进程
+        self.prefilter = None # 可选的 HistogramPrefilter，颜色分布不可能匹配时跳过 matchTemplate
+        # 截图范围 (如游戏窗口) 变化后缓存的帧不再可用
+        self.screen.add_bounds_listener(lambda _bounds: self.invalidate_frame())
+        # 模板缓存: 路径 -> (模板, (w, h))；(路径, 模式) -> 转换后的模板；(路径, 模式, "pyr", 层数) -> 缩小后的模板；
+        # (路径, "hist", 区间数) -> 预筛选使用的颜色直方图；(路径, "exact-index") -> 精确模式的 ExactIndex
+        self.template_cache = TemplateCache(template_cache_bytes, template_miss_ttl)
+        self.set_match_threads(match_threads)
         print(f"[Vision] 视觉核心已初始化 (默认相似度: {default_confidence})")
 
     def _load_template(self, template_path):
-        """私有方法，用于加载或从缓存中读取模板。"""
-        if template_path in self.template_cache:
-            return self.template_cache[template_path]
+        """私有方法，用于加载或从缓存中读取模板。设置了图集时优先使用映射的像素，无需解码 PNG。"""
+        cached = self.template_cache.get(template_path)
+        if cached is not None:
+            return cached
+        if self.template_cache.is_missing(template_path):
+            # 最近加载失败过，不再重复访问磁盘和打印错误
+            return None, (0, 0)
+
+        if self.atlas is not None:
+            template = self.atlas.get(template_path)
+            if template is not None:
+                template = self._apply_scale(template_path, template)
+                h, w = template.shape[:2]
+                self.template_cache.put(template_path, (template, (w, h)))
+                return template, (w, h)
 
         if not os.path.exists(template_path):
             print(f"[Vision] 错误: 模板文件未找到 {template_path}")
+            self.template_cache.put_missing(template_path)
             return None, (0, 0)
         
         template = cv2.imread(template_path, cv2.IMREAD_COLOR)
         
         if template is None:
             print(f"[Vision] 错误: 无法使用 OpenCV 读取模板 {template_path}")
+            self.template_cache.put_missing(template_path)
             return None, (0, 0)
         
         try:
+            template = self._apply_scale(template_path, template)
             h, w = template.shape[:2]
-            self.template_cache[template_path] = (template, (w, h))
+            self.template_cache.put(template_path, (template, (w, h)))
             return template, (w, h)
         except AttributeError:
             print(f"[Vision] 模板文件 {template_path} 加载失败或格式错误")
+            self.template_cache.put_missing(template_path)
+            return None, (0, 0)
+
+    def _spec(self, template_path):
+        """模板清单中的对应项 (未设置注册表或不在清单中时为 None)。"""
+        if self.registry is None:
+            return None
+        return self.registry.spec(template_path)
+
+    def _template_scale(self, template_path):
+        """模板的实际缩放比例: 模板清单中的 scale 乘以校准得到的全局 template_scale。"""
+        spec = self._spec(template_path)
+        return (spec.scale if spec is not None else 1.0) * self.template_scale
+
+    def _apply_scale(self, template_path, template):
+        """按缩放比例缩放模板 (例如模板截自与当前画面不同的分辨率或系统缩放)。"""
+        scale = self._template_scale(template_path)
+        if scale == 1.0:
+            return template
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        return cv2.resize(template, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    def set_template_scale(self, scale):
+        """设置全局模板缩放比例 (通常由 ScaleCalibrator 设置)，已缓存的模板会按新比例重新加载。"""
+        if scale == self.template_scale:
+            return
+        self.template_scale = scale
+        self.template_cache.clear()
+        self._memo.clear()
+        print(f"[Vision] 模板缩放比例: {scale:.3f}")
+
+    def _confidence_for(self, template_path, confidence=None):
+        """调用方未指定阈值时，依次使用模板清单中的阈值、匹配模式的阈值和默认阈值。"""
+        if confidence is not None:
+            return confidence
+        spec = self._spec(template_path)
+        if spec is not None and spec.confidence is not None:
+            return spec.confidence
+        return self.mode_confidence.get(self._mode_for(template_path), self.default_confidence)
+
+    def _mode_for(self, template_path):
+        """模板的匹配模式: 模板清单中的 mode，未指定时使用 default_mode。"""
+        spec = self._spec(template_path)
+        mode = spec.mode if spec is not None and spec.mode is not None else self.default_mode
+        if mode == "exact" and self._template_scale(template_path) != 1.0:
+            return "bgr" # 缩放后的模板不可能与画面像素完全一致
+        return mode
+
+    def _converted_template(self, template_path, template, mode):
+        """按匹配模式转换后的模板 (缓存)；图集中已有灰度版本时直接使用。"""
+        if mode in ("bgr", "exact") or template is None:
+            return template
+        converted = self.template_cache.get((template_path, mode))
+        if converted is None:
+            if mode == "gray" and self.atlas is not None and self._template_scale(template_path) == 1.0:
+                converted = self.atlas.get(template_path, "gray")
+            if converted is None:
+                converted = convert_image(template, mode)
+            self.template_cache.put((template_path, mode), converted)
+        return converted
+
+    @staticmethod
+    def _converted_screen(screen, mode, derived, key):
+        """按匹配模式转换画面，结果按 (区域, 模式) 缓存在 derived 中，同一帧上同模式的模板只转换一次。"""
+        if mode in ("bgr", "exact"):
+            return screen
+        converted = derived.get((key, mode))
+        if converted is None:
+            converted = derived[(key, mode)] = convert_image(screen, mode)
+        return converted
+
+    def _iter_regions(self, region):
+        """将 region 参数展开为区域列表；None 表示整个截图范围。"""
+        if region is None:
+            return [None]
+        if is_region_list(region):
+            return list(region)
+        return [region]
+
+    def set_capture_service(self, capture_service, max_frame_age_ms=None):
+        """设置 (或用 None 取消) 后台截图服务。"""
+        self.capture_service = capture_service
+        if max_frame_age_ms is not None:
+            self.max_frame_age_ms = max_frame_age_ms
+
+    def invalidate_frame(self):
+        """丢弃缓存的帧 (例如点击之后画面即将变化)。snapshot() 作用域内也会在下次匹配时重新截图。"""
+        if self._cached_pin is not None and self.capture_service is not None:
+            self.capture_service.release(self._cached_pin)
+        self._cached_frame = None
+        self._cached_pin = None
+        self._handoff = False
+        self._pyramid_cache = {}
+
+    def _store_frame(self, image, pin=None):
+        self.invalidate_frame()
+        self._cached_frame = image
+        self._cached_at = time.monotonic()
+        self._cached_pin = pin
+
+    def _cache_fresh(self):
+        if self._cached_frame is None:
+            return False
+        if self._snapshot_depth > 0 or self._handoff:
+            return True
+        return self.frame_cache_ttl > 0 and time.monotonic() - self._cached_at <= self.frame_cache_ttl
+
+    def _capture_full(self):
+        """同步截取整屏到 Vision 私有缓冲区，避免被其他使用同一 Screen 的调用方覆盖。"""
+        shape = (self.screen.monitor['height'], self.screen.monitor['width'], 3)
+        if self._frame_buffer is None or self._frame_buffer.shape != shape:
+            self._frame_buffer = np.empty(shape, dtype=np.uint8)
+        return readonly(self.screen.capture(out=self._frame_buffer))
+
+    @contextmanager
+    def snapshot(self):
+        """
+        决策步骤作用域: with vision.snapshot(): 内的所有匹配共用同一帧截图。
+        进入最外层作用域时丢弃旧缓存，首次匹配时截取新帧。可嵌套。
+        """
+        if self._snapshot_depth == 0:
+            self.invalidate_frame()
+        self._snapshot_depth += 1
+        try:
+            yield self
+        finally:
+            self._snapshot_depth -= 1
+
+    def _refresh_bounds(self):
+        """按间隔廉价校验游戏窗口位置和显示器配置 (snapshot() 作用域内截图范围保持不变)。"""
+        if self._snapshot_depth == 0:
+            self.screen.refresh_window()
+
+    @contextmanager
+    def _frame(self, full=True):
+        """
+        取得本次匹配使用的整屏帧。
+        依次尝试: 缓存中仍有效的帧 → 后台截图服务的最新帧 → 需要缓存时同步截取整屏；
+        都不适用时产出 None，由 _grab 按区域同步截图。
+        :param full: 本次是否要匹配整屏 (只匹配区域且无需缓存时不截取整屏)
+        """
+        self._refresh_bounds()
+        if self._cache_fresh():
+            self._handoff = False
+            yield self._cached_frame
+            return
+        caching = self._snapshot_depth > 0 or self.frame_cache_ttl > 0
+        if self.capture_service is not None:
+            frame = self.capture_service.acquire(self.max_frame_age_ms)
+            bounds = self.screen.monitor
+            if frame is not None and frame.image.shape[:2] != (bounds['height'], bounds['width']):
+                # 截图范围刚变化，环形缓冲区里还是旧尺寸的帧
+                self.capture_service.release(frame)
+                frame = None
+            if frame is not None:
+                if caching:
+                    # 缓存期间继续占用槽位，被替换时释放
+                    self._store_frame(frame.image, frame)
+                    yield frame.image
+                    return
+                try:
+                    yield frame.image
+                finally:
+                    self.capture_service.release(frame)
+                return
+        if caching and (full or self._snapshot_depth > 0):
+            image = self._capture_full()
+            self._store_frame(image)
+            yield image
+            return
+        yield None
+
+    def _grab(self, region=None, frame=None):
+        """
+        截取整个截图范围或指定区域；给定 frame 时直接从中裁剪，不再截图。
+        返回: (image, (offset_x, offset_y))，偏移用于把区域内坐标换算回截图范围坐标。
+        """
+        if region is None:
+            if frame is not None:
+                return frame, (0, 0)
+            return self.screen.capture(), (0, 0)
+        rect = self.screen.clip_region(region)
+        if rect is None:
             return None, (0, 0)
+        if frame is not None:
+            left, top, width, height = rect
+            return frame[top:top + height, left:left + width], (left, top)
+        return self.screen.capture(rect), (rect[0], rect[1])
+
+    def _exact_find(self, template_path, template, screen):
+        """
+        精确模式查找: 返回模板在 screen 中所有像素完全一致的位置；
+        模板无法建立索引 (全部是单色行) 或候选过多时返回 None，由调用方回退到相关匹配。
+        """
+        index = self.template_cache.get((template_path, "exact-index"))
+        if index is None:
+            index = ExactIndex(template)
+            self.template_cache.put((template_path, "exact-index"), index)
+        return index.find_all(screen) if index.usable else None
+
+    def _content_hash(self, screen, derived, key):
+        """区域像素的快速哈希 (按 memo_row_stride 抽行)，按区域缓存在 derived 中，同一帧只计算一次。"""
+        digest = derived.get((key, "digest"))
+        if digest is None:
+            data = np.ascontiguousarray(screen[::self.memo_row_stride] if self.memo_row_stride > 1 else screen)
+            digest = xxhash.xxh3_64_intdigest(data) if xxhash is not None else zlib.crc32(data)
+            derived[(key, "digest")] = digest
+        return digest
+
+    def _memo_key(self, template_path, mode, confidence, scale, key):
+        """scale 是加载模板前取得的缩放比例: 加载途中比例被校准改变时，结果记在旧比例下，不会被新比例的查找命中。"""
+        return (template_path, mode, confidence, self.pyramid_levels, scale, key)
+
+    def _memo_get(self, memo_key, digest):
+        """区域内容与上次匹配时相同时返回上次的 (相似度, 位置)，否则返回 None。"""
+        entry = self._memo.get(memo_key)
+        if entry is not None and entry[0] == digest:
+            self._memo.move_to_end(memo_key)
+            self.memo_hits += 1
+            return entry[1]
+        self.memo_misses += 1
+        return None
+
+    def _memo_put(self, memo_key, digest, result):
+        self._memo[memo_key] = (digest, result)
+        self._memo.move_to_end(memo_key)
+        while len(self._memo) > self.memo_entries:
+            self._memo.popitem(last=False)
+
+    def _may_contain(self, template_path, template, screen, derived, key):
+        """
+        预筛选: 画面 (区域) 的颜色分布能否容纳模板。只用于 PREFILTER_MODES 中的模式:
+        gray / 单通道 / edge 正是为了容忍颜色差异而选用的，BGR 直方图可能排除它们能匹配到的画面。
+        模板直方图随模板缓存 (缩放变化时一起失效)，画面直方图按区域缓存在 derived 中，同一帧只计算一次。
+        """
+        bins = self.prefilter.bins
+        template_hist = self.template_cache.get((template_path, "hist", bins))
+        if template_hist is None:
+            template_hist = self.prefilter.histogram(template)
+            self.template_cache.put((template_path, "hist", bins), template_hist)
+        frame_hist = derived.get((key, "hist", bins))
+        if frame_hist is None:
+            frame_hist = derived[(key, "hist", bins)] = self.prefilter.histogram(screen)
+        return self.prefilter.may_contain(template_path, template_hist, frame_hist)
+
+    @staticmethod
+    def _pyr_down(image, levels):
+        for _ in range(levels):
+            image = cv2.pyrDown(image)
+        return image
+
+    def _pyramids_for(self, frame):
+        """本次匹配使用的缩小图缓存: 匹配的是缓存帧时跨调用复用，否则只在本次调用内共享。"""
+        if frame is not None and frame is self._cached_frame:
+            return self._pyramid_cache
+        return {}
+
+    def set_match_threads(self, threads):
+        """
+        设置并行匹配的线程数；0 或 1 关闭线程池，改回在调用线程上依次匹配。
+        可在其他线程 (配置热重载) 中调用: 先创建新线程池，在锁内替换引用并关闭旧线程池 (不等待)，
+        旧线程池执行完已提交的任务后退出；匹配调用在同一把锁内读取 _executor 并提交，不会提交到已关闭的线程池。
+        """
+        threads = max(int(threads or 0), 0)
+        if threads == self.match_threads:
+            return
+        executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="VisionMatch") if threads > 1 else None
+        with self._executor_lock:
+            previous, self._executor = self._executor, executor
+            self.match_threads = threads
+            if previous is not None:
+                previous.shutdown(wait=False)
+        if executor is not None:
+            print(f"[Vision] 并行匹配已启用 ({threads} 线程)")
+
+    def close(self):
+        """关闭并行匹配线程池 (等待已提交的任务完成)。"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+            self.match_threads = 0
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _match_map(self, screen, template, tiled=True):
+        """
+        计算完整的匹配结果图。启用线程池且画面足够大时把画面按行切成重叠的分块并行匹配
+        (相邻分块重叠模板高度 - 1 行，拼接后与整块匹配的结果图逐位置对应)，按分块顺序拼接，结果与线程调度无关。
+        :param tiled: False 时不分块 (已在线程池中执行时使用，避免线程池任务互相等待)
+        """
+        if not tiled or self._executor is None:
+            return cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        rows = screen.shape[0] - template.shape[0] + 1
+        overlap = template.shape[0] - 1
+        with self._executor_lock:
+            executor = self._executor
+            tiles = min(self.match_threads, rows // self.min_tile_rows) if executor is not None else 1
+            if tiles > 1:
+                bounds = [rows * i // tiles for i in range(tiles + 1)]
+                futures = [executor.submit(cv2.matchTemplate, screen[top:bottom + overlap], template,
+                                           cv2.TM_CCOEFF_NORMED)
+                           for top, bottom in zip(bounds, bounds[1:])]
+        if tiles <= 1:
+            return cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        return np.concatenate([future.result() for future in futures])
 
-    def find_template(self, template_path, confidence=None):
+    def _match(self, screen, template_path, template, confidence, pyramids, key, tiled=True, mode="bgr"):
+        """
+        在 screen 上匹配模板，返回 (最高相似度, 左上角位置)。
+        启用金字塔时先在缩小的画面上粗匹配，再只在候选位置附近的全分辨率小窗口内细化；
+        缩小的画面按 key 缓存在 pyramids 中，供同一帧上的其他模板复用。
+        :param tiled: 是否允许把整屏匹配分块并行 (见 _match_map)
+        :param mode: screen 和 template 已转换成的匹配模式
+        """
+        if mode == "exact":
+            found = self._exact_find(template_path, template, screen)
+            if found is not None:
+                return (1.0, found[0]) if found else (0.0, (0, 0))
+        # 边缘图只有一两个像素宽的线条，缩小后基本消失，因此边缘模式始终全分辨率匹配
+        levels = 0 if mode == "edge" else self.pyramid_levels
+        template_h, template_w = template.shape[:2]
+        # 模板缩小后太小 (特征丢失) 时退回全分辨率匹配
+        if levels <= 0 or min(template_h, template_w) >> levels < 8:
+            result = self._match_map(screen, template, tiled)
+            _min_val, max_val, _min_loc, max_loc = cv2.minMaxLoc(result)
+            return max_val, max_loc
+
+        small_screen = pyramids.get((key, levels))
+        if small_screen is None:
+            # 并行匹配多个模板时可能有两个线程同时生成同一缩小图，结果相同，后写入的覆盖先写入的
+            small_screen = pyramids[(key, levels)] = self._pyr_down(screen, levels)
+        small_template = self.template_cache.get((template_path, mode, "pyr", levels))
+        if small_template is None:
+            if mode == "bgr" and self.atlas is not None and self._template_scale(template_path) == 1.0:
+                small_template = self.atlas.get(template_path, f"pyr{levels}")
+            if small_template is None:
+                small_template = self._pyr_down(template, levels)
+            self.template_cache.put((template_path, mode, "pyr", levels), small_template)
+        if small_screen.shape[0] < small_template.shape[0] or small_screen.shape[1] < small_template.shape[1]:
+            return -1.0, (0, 0)
+
+        coarse = self._match_map(small_screen, small_template, tiled)
+        return pyramid_refine(screen, template, coarse, small_template.shape[:2], levels, confidence,
+                              self.pyramid_margin, self.pyramid_candidates)
+
+    def find_template(self, template_path, confidence=None, region=None):
         """
         在屏幕上查找模板图像。
-        返回: (x, y) 中心坐标 (如果找到) 或 None (如果未找到)。
+        :param region: 可选的搜索区域 (left, top, width, height)，相对截图范围 (显示器或游戏窗口) 左上角；
+                       也可以传入多个区域组成的列表，只截取并匹配这些区域的像素
+        返回: (x, y) 中心坐标 (相对截图范围，如果找到) 或 None (如果未找到)。
+        """
+        match = self.find_any([template_path], confidence, region)
+        return match.coords if match else None
+
+    def find_any(self, template_paths, confidence=None, region=None, prioritized=True):
+        """
+        只截图一次，在同一帧上依次匹配多个模板 (例如胜利/失败、确认/完成)。
+        :param template_paths: 模板路径列表，顺序即优先级
+        :param region: 可选的搜索区域 (或区域列表)，所有模板共用
+        :param prioritized: True 时返回达到阈值的、排在最前的模板，并跳过排在它之后的模板；
+                            False 时匹配全部模板并返回得分最高者
+        返回: Match(template, score, coords) 或 None (都未找到)。
+        未指定 confidence / region 时使用模板清单中的设置 (region 只在单个模板时生效)。
+        """
+        if region is None and len(template_paths) == 1:
+            spec = self._spec(template_paths[0])
+            if spec is not None:
+                region = spec.region
+
+        # 设置了位置提示时，单模板整屏查找先只搜索历史热点附近，未命中再回退整屏
+        # (多模板时热点区域外可能有优先级更高的模板，因此直接整屏匹配)
+        match = None
+        if self.hints is not None and region is None and len(template_paths) == 1:
+            path = template_paths[0]
+            hint_regions = self.hints.regions(path, self.screen.monitor)
+            if hint_regions:
+                match = self._find_any(template_paths, confidence, hint_regions, prioritized)
+                self.hints.record_lookup(path, "hint" if match else "fallback")
+            else:
+                self.hints.record_lookup(path, "cold")
+        if match is None:
+            match = self._find_any(template_paths, confidence, region, prioritized)
+        if match is not None and self.hints is not None:
+            self.hints.record_hit(match.template, match.bbox, self.screen.monitor)
+        return match
+
+    def _find_any(self, template_paths, confidence, region, prioritized):
+        """find_any 的实际匹配过程 (不使用位置提示)。"""
+        # 先校验窗口: 窗口缩放触发的重新校准必须发生在加载模板之前，否则本次会用旧比例的模板匹配
+        self._refresh_bounds()
+        scales = [self._template_scale(path) for path in template_paths]
+        templates = [(path,) + self._load_template(path) for path in template_paths]
+        thresholds = [self._confidence_for(path, confidence) for path in template_paths]
+        modes = [self._mode_for(path) for path in template_paths]
+        converted = [self._converted_template(path, template, mode)
+                     for (path, template, _size), mode in zip(templates, modes)]
+        # 每个模板在所有区域中的最佳结果: (score, center, bbox)
+        best = [(-1.0, None, None)] * len(templates)
+        top_scores = [0.0] * len(templates) # 未达到阈值时也记录最高分，便于事后排查
+        limit = len(templates) # 优先模式下只需继续匹配排在已命中模板之前的模板
+        with self._frame(full=region is None) as frame:
+            pyramids = self._pyramids_for(frame)
+            for rect in self._iter_regions(region):
+                if limit == 0:
+                    break
+                # 1. 截取屏幕或区域 (通过我们持有的 screen 实例，或直接使用后台帧)，所有模板共用
+                screen, (offset_x, offset_y) = self._grab(rect, frame)
+                if self.recorder is not None:
+                    self.recorder.record_frame(screen, (offset_x, offset_y))
+                if screen is None:
+                    continue
+                key = (offset_x, offset_y) + screen.shape[:2]
+                pending = [i for i, (_path, template, (template_w, template_h)) in enumerate(templates[:limit])
+                           if template is not None and screen.shape[0] >= template_h and screen.shape[1] >= template_w]
+                memo_keys, remembered = {}, {}
+                # 精确模式的查找比计算内容哈希还快，不参与记忆
+                memorable = [i for i in pending if modes[i] != "exact"]
+                if self.memo_entries > 0 and memorable:
+                    # 区域像素与上次匹配该模板时相同 (长时间等待时很常见)，直接复用上次的结果
+                    digest = self._content_hash(screen, pyramids, key)
+                    for i in memorable:
+                        memo_keys[i] = self._memo_key(templates[i][0], modes[i], thresholds[i], scales[i], key)
+                        result = self._memo_get(memo_keys[i], digest)
+                        if result is not None:
+                            remembered[i] = result
+                if self.prefilter is not None:
+                    # 画面颜色分布不可能包含的模板直接跳过匹配 (等待模板时大多数轮询都属于这种情况)；
+                    # 记忆命中的模板已有结果，不再预筛选 (见 stats())
+                    pending = [i for i in pending if i in remembered or modes[i] not in PREFILTER_MODES
+                               or self._may_contain(templates[i][0], templates[i][1], screen, pyramids, key)]
+                todo = [i for i in pending if i not in remembered]
+                # 同一帧上每种匹配模式只转换一次画面 (在调用线程上完成，线程池任务直接使用)
+                screens = {modes[i]: self._converted_screen(screen, modes[i], pyramids, key) for i in todo}
+                results = {}
+                # 精确模式的查找不到 1 毫秒，不值得分发，始终在调用线程上执行
+                parallel = [i for i in todo if modes[i] != "exact"]
+                if self.workers is not None and len(parallel) >= self.workers.min_templates:
+                    # 模板很多时交给进程池: 画面发布到共享内存，每个模板一个任务，结果同样按模板顺序处理
+                    jobs = [(templates[i][0], self._template_scale(templates[i][0]), thresholds[i], modes[i])
+                            for i in parallel]
+                    futures = self.workers.submit(screen, jobs, self.pyramid_levels, self.pyramid_margin,
+                                                  self.pyramid_candidates)
+                    results = dict(zip(parallel, futures))
+                elif self._executor is not None and len(parallel) > 1:
+                    # 多个模板在线程池中同时匹配 (每个模板不再分块)，之后仍按模板顺序处理结果
+                    with self._executor_lock:
+                        executor = self._executor
+                        if executor is not None:
+                            results = {i: executor.submit(self._match, screens[modes[i]], templates[i][0],
+                                                          converted[i], thresholds[i], pyramids, key + (modes[i],),
+                                                          False, modes[i])
+                                       for i in parallel}
+                for i in pending:
+                    path, template, (template_w, template_h) = templates[i]
+
+                    # 2. 执行模板匹配，并获取最匹配的位置和相似度 (转换后的画面和缩小图按区域缓存，供其他模板复用)
+                    if i in remembered:
+                        max_val, max_loc = remembered[i]
+                    else:
+                        if i in results:
+                            max_val, max_loc = results[i].result()
+                        else:
+                            max_val, max_loc = self._match(screens[modes[i]], path, converted[i], thresholds[i],
+                                                           pyramids, key + (modes[i],), mode=modes[i])
+                        if i in memo_keys:
+                            self._memo_put(memo_keys[i], digest, (max_val, max_loc))
+                    top_scores[i] = max(top_scores[i], max_val)
+
+                    # 3. 检查相似度是否达到阈值，多个区域时取最佳者
+                    if max_val >= thresholds[i] and max_val > best[i][0]:
+                        # 4. 计算中心点坐标 (换算回截图范围坐标)
+                        left, top = offset_x + max_loc[0], offset_y + max_loc[1]
+                        best[i] = (max_val, (left + template_w / 2, top + template_h / 2),
+                                   (left, top, template_w, template_h))
+                        if prioritized:
+                            limit = i + 1
+                            for future in results.values():
+                                future.cancel() # 排在后面的模板不再需要，尚未开始的任务直接取消
+                            break
+
+        if self.recorder is not None:
+            for i, (path, template, _size) in enumerate(templates):
+                if template is not None:
+                    self.recorder.record_match(os.path.basename(path), top_scores[i], best[i][1], region)
+
+        # 5. 返回结果 (未找到时为 None)
+        found = [Match(templates[i][0], score, center, bbox) for i, (score, center, bbox) in enumerate(best)
+                 if center is not None]
+        if not found:
+            return None
+        if prioritized:
+            return found[0]
+        return max(found, key=lambda m: m.score)
+
+    @staticmethod
+    def _suppress(matches, overlap):
+        """
+        贪心非极大值抑制: 按相似度从高到低保留结果，丢弃与已保留结果重叠过多的结果。
+        :param overlap: 两个结果在水平和垂直方向的重叠比例都超过该值时视为同一目标
+        """
+        kept = []
+        for match in sorted(matches, key=lambda m: m.score, reverse=True):
+            left, top, width, height = match.bbox
+            for other in kept:
+                o_left, o_top, o_width, o_height = other.bbox
+                overlap_x = min(left + width, o_left + o_width) - max(left, o_left)
+                overlap_y = min(top + height, o_top + o_height) - max(top, o_top)
+                if overlap_x > overlap * min(width, o_width) and overlap_y > overlap * min(height, o_height):
+                    break
+            else:
+                kept.append(match)
+        return kept
+
+    def find_all_templates(self, template_path, confidence=None, region=None, max_results=None, overlap=0.5):
+        """
+        只截图一次，找出模板的所有实例 (例如一排购买按钮、一列奖励按钮)。
+        对匹配结果图按阈值筛选后做非极大值抑制，同一目标只保留得分最高的位置。
+        :param region: 可选的搜索区域 (或区域列表)
+        :param max_results: 最多返回的结果数，None 表示不限
+        :param overlap: 非极大值抑制的重叠比例阈值 (0~1)
+        返回: 按相似度从高到低排列的 Match 列表 (未找到时为空列表)。
         """
-        if confidence is None:
-            confidence = self.default_confidence
-            
+        confidence = self._confidence_for(template_path, confidence)
+        if region is None:
+            spec = self._spec(template_path)
+            region = spec.region if spec is not None else None
+
+        self._refresh_bounds() # 与 _find_any 相同，窗口缩放引起的重新校准先于加载模板
         template, (template_w, template_h) = self._load_template(template_path)
         if template is None:
+            return []
+        mode = self._mode_for(template_path)
+        converted = self._converted_template(template_path, template, mode)
+
+        candidates = []
+        top_score = 0.0
+        with self._frame(full=region is None) as frame:
+            derived = self._pyramids_for(frame)
+            for rect in self._iter_regions(region):
+                screen, (offset_x, offset_y) = self._grab(rect, frame)
+                if self.recorder is not None:
+                    self.recorder.record_frame(screen, (offset_x, offset_y))
+                if screen is None or screen.shape[0] < template_h or screen.shape[1] < template_w:
+                    continue
+
+                key = (offset_x, offset_y) + screen.shape[:2]
+                if (self.prefilter is not None and mode in PREFILTER_MODES
+                        and not self._may_contain(template_path, template, screen, derived, key)):
+                    continue
+                found = self._exact_find(template_path, template, screen) if mode == "exact" else None
+                if found is not None:
+                    top_score = max(top_score, 1.0 if found else 0.0)
+                    for x, y in found:
+                        left, top = offset_x + x, offset_y + y
+                        candidates.append(Match(template_path, 1.0, (left + template_w / 2, top + template_h / 2),
+                                                (left, top, template_w, template_h)))
+                    continue
+                result = self._match_map(self._converted_screen(screen, mode, derived, key), converted)
+                top_score = max(top_score, float(result.max()))
+                # 阈值以上的位置通常成片出现: 先只保留 3x3 邻域内的局部极大值，再由 _suppress 去重
+                peaks = (result >= confidence) & (result >= cv2.dilate(result, None))
+                ys, xs = np.nonzero(peaks)
+                for x, y in zip(xs.tolist(), ys.tolist()):
+                    left, top = offset_x + x, offset_y + y
+                    candidates.append(Match(template_path, float(result[y, x]),
+                                            (left + template_w / 2, top + template_h / 2),
+                                            (left, top, template_w, template_h)))
+
+        # 多个区域可能重叠，合并后统一抑制
+        matches = self._suppress(candidates, overlap)
+        if max_results is not None:
+            matches = matches[:max_results]
+
+        if self.recorder is not None:
+            self.recorder.record_match(os.path.basename(template_path), top_score,
+                                       [m.coords for m in matches] or None, region)
+        return matches
+
+    @staticmethod
+    def _parse_color(color):
+        """"#RRGGBB" (与 Controls.get_pixel_color 相同的格式) 或 (r, g, b) -> (b, g, r)。"""
+        if isinstance(color, str):
+            color = color.lstrip('#')
+            color = tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+        r, g, b = color
+        return b, g, r
+
+    def find_color_blobs(self, color, tolerance=30, min_area=20, region=None, max_area=None, max_results=None):
+        """
+        只截图一次，找出颜色接近 color 的所有连通区域 (例如红点提示、角标)，代替逐个像素调用 get_pixel_color。
+        与目标颜色的 RGB 欧氏距离小于 tolerance 的像素组成掩码，再用 connectedComponentsWithStats
+        一次求出每个连通区域的面积、外接矩形和质心。
+        :param color: 目标颜色，"#RRGGBB" 或 (r, g, b)
+        :param tolerance: 颜色距离阈值 (与 Controls.is_similar_color 的 threshold 含义相同)
+        :param min_area: 最小面积 (像素数)，过滤零散的噪点
+        :param region: 可选的搜索区域 (或区域列表)
+        :param max_area: 最大面积，None 表示不限 (排除大片同色背景)
+        :param max_results: 最多返回的结果数，None 表示不限
+        返回: 按面积从大到小排列的 Blob 列表 (未找到时为空列表)。
+        """
+        b, g, r = self._parse_color(color)
+        blobs = []
+        with self._frame(full=region is None) as frame:
+            for rect in self._iter_regions(region):
+                screen, (offset_x, offset_y) = self._grab(rect, frame)
+                if self.recorder is not None:
+                    self.recorder.record_frame(screen, (offset_x, offset_y))
+                if screen is None:
+                    continue
+                # 各通道差都不超过 tolerance 是欧氏距离小于 tolerance 的必要条件，没有这样的像素时直接跳过
+                lower = (max(b - tolerance, 0), max(g - tolerance, 0), max(r - tolerance, 0))
+                upper = (min(b + tolerance, 255), min(g + tolerance, 255), min(r + tolerance, 255))
+                if cv2.countNonZero(cv2.inRange(screen, lower, upper)) < min_area:
+                    continue
+                diff = cv2.absdiff(screen, (b, g, r, 0)).astype(np.float32)
+                distance = cv2.transform(cv2.multiply(diff, diff), np.ones((1, 3), dtype=np.float32))
+                mask = np.less(distance, tolerance * tolerance).view(np.uint8)
+                count, _labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+                for label in range(1, count): # 0 是背景
+                    left, top, width, height, area = stats[label].tolist()
+                    if area < min_area or (max_area is not None and area > max_area):
+                        continue
+                    cx, cy = centroids[label]
+                    blobs.append(Blob((offset_x + float(cx), offset_y + float(cy)),
+                                      (offset_x + left, offset_y + top, width, height), area))
+
+        blobs.sort(key=lambda blob: blob.area, reverse=True)
+        if max_results is not None:
+            blobs = blobs[:max_results]
+        if self.recorder is not None:
+            self.recorder.record_match(f"color {color}", float(len(blobs)), [blob.center for blob in blobs] or None,
+                                       region)
+        return blobs
+
+    def _change_signal(self, template_paths, region):
+        """
+        返回 poller 使用的画面变化检测函数: 截取将要匹配的范围并缩小为缩略图。
+        每轮都会截图；启用帧缓存或后台截图服务时紧接着的匹配复用这次截图。
+        都未启用时，整屏截图通过一次性交接给下一次匹配，避免每轮截两次整屏 (区域截图本身很廉价，不做交接)。
+        """
+        if region is None and len(template_paths) == 1:
+            spec = self._spec(template_paths[0])
+            region = spec.region if spec is not None else None
+
+        def signal():
+            if self._handoff:
+                self.invalidate_frame() # 上一轮画面静止、没有匹配，交接的帧已过时
+            with self._frame(full=region is None) as frame:
+                if frame is None and region is None:
+                    frame = self._capture_full()
+                    self._store_frame(frame)
+                    self._handoff = True
+                return [self.poller.thumbnail(self._grab(rect, frame)[0]) for rect in self._iter_regions(region)]
+        return signal
+
+    def _poll(self, check, template_paths, region, timeout, interval):
+        """用 poller 等待 check() 成功；结束时丢弃变化检测交接但未被匹配使用的帧，之后的查找不会用到过时的画面。"""
+        try:
+            return self.poller.wait(check, self._change_signal(template_paths, region), timeout, interval)
+        finally:
+            if self._handoff:
+                self.invalidate_frame()
+
+    def wait_for_template(self, template_path, timeout=10, confidence=None, interval=None, region=None):
+        """
+        在 'timeout' 秒内查找模板，直到找到或超时。
+        先立即查找一次，之后只在画面变化时重新匹配 (见 AdaptivePoller)。
+        :param interval: 画面静止时的最长检查间隔 (秒)，缺省使用 poller.max_interval
+        :param region: 可选的搜索区域 (或区域列表)，透传给 find_template
+        """
+        print(f"[Vision] 正在等待 {os.path.basename(template_path)} (超时: {timeout}s)")
+        if self._load_template(template_path)[0] is None:
+            # 模板缺失时等待没有意义，直接跳过这一步
+            print(f"[Vision] 跳过等待: 模板 {os.path.basename(template_path)} 不可用")
             return None
 
-        # 1. 截取屏幕 (通过我们持有的 screen 实例)
-        screen = self.screen.capture()
+        # 在轮询中调用我们自己的 find_template 方法
+        coords = self._poll(lambda: self.find_template(template_path, confidence, region), [template_path], region,
+                            timeout, interval)
+        if coords:
+            print(f"[Vision] 成功找到 {os.path.basename(template_path)} at {coords}")
+            return coords
+        print(f"[Vision] 超时: {timeout}秒内未找到 {os.path.basename(template_path)}")
+        return None
+
+    def wait_for_any(self, template_paths, timeout=10, confidence=None, interval=None, region=None,
+                     prioritized=True):
+        """
+        在 'timeout' 秒内查找多个模板中的任意一个，每轮只截图一次，画面静止时不重复匹配。
+        参数含义同 find_any，interval 同 wait_for_template。
+        返回: Match(template, score, coords) 或 None (超时)。
+        """
+        names = ", ".join(os.path.basename(p) for p in template_paths)
+        print(f"[Vision] 正在等待 {names} 之一 (超时: {timeout}s)")
+        if all(self._load_template(path)[0] is None for path in template_paths):
+            print(f"[Vision] 跳过等待: 模板 {names} 均不可用")
+            return None
 
-        # 2. 执行模板匹配
-        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
-        
-        # 3. 获取最匹配的位置和相似度
-        _min_val, max_val, _min_loc, max_loc = cv2.minMaxLoc(result)
-        
-        # 4. 检查相似度是否达到阈值
-        if max_val >= confidence:
-            # 5. 计算中心点坐标
-            center_x = max_loc[0] + template_w / 2
-            center_y = max_loc[1] + template_h / 2
-            
-            return (center_x, center_y)
-
-        # 6. 未找到
+        match = self._poll(lambda: self.find_any(template_paths, confidence, region, prioritized), template_paths,
+                           region, timeout, interval)
+        if match:
+            print(f"[Vision] 成功找到 {os.path.basename(match.template)} at {match.coords} "
+                  f"(相似度: {match.score:.3f})")
+            return match
+        print(f"[Vision] 超时: {timeout}秒内未找到 {names}")
         return None
 
-    def wait_for_template(self, template_path, timeout=10, confidence=None, interval=0.5):
+    def set_recorder(self, recorder):
+        """设置 (或用 None 取消) FlightRecorder，记录匹配过的帧与结果。"""
+        self.recorder = recorder
+
+    def set_hints(self, hints):
+        """设置 (或用 None 取消) LocationHints，整屏查找时优先搜索模板上次出现的位置。"""
+        self.hints = hints
+
+    def set_atlas(self, atlas):
+        """设置 (或用 None 取消) TemplateAtlas；已缓存的模板会被丢弃，下次使用时从新图集读取。"""
+        self.atlas = atlas
+        self.template_cache.clear()
+        self._memo.clear()
+
+    def set_registry(self, registry):
+        """设置 (或用 None 取消) TemplateRegistry；已缓存的模板会被丢弃，以便按新的缩放重新加载。"""
+        self.registry = registry
+        self.template_cache.clear()
+        self._memo.clear()
+
+    def set_workers(self, workers):
+        """设置 (或用 None 取消) MatchWorkerPool；模板数达到其 min_templates 的匹配改由工作进程执行。"""
+        self.workers = workers
+
+    def stats(self):
         """
-        在 'timeout' 秒内循环查找模板，直到找到或超时。
+        视觉统计: 模板缓存、匹配结果记忆命中率，以及启用时的颜色预筛选计数。
+        每个模板先查匹配结果记忆，命中的不再经过预筛选，因此画面不变时预筛选的检查次数不增加；
+        预筛选统计中的 memo_hits 是这部分 (未经预筛选) 的次数，checks + memo_hits 才是全部查找。
         """
-        print(f"[Vision] 正在等待 {os.path.basename(template_path)} (超时: {timeout}s)")
-        start_time = time.time()
-        
-        while True:
-            # 在循环中调用我们自己的 find_template 方法
-            coords = self.find_template(template_path, confidence)
-            if coords:
-                print(f"[Vision] 成功找到 {os.path.basename(template_path)} at {coords}")
-                return coords
-            
-            if time.time() - start_time > timeout:
-                print(f"[Vision] 超时: {timeout}秒内未找到 {os.path.basename(template_path)}")
-                return None
-            
-            time.sleep(interval)
+        lookups = self.memo_hits + self.memo_misses
+        stats = {
+            "template_cache": self.template_cache.stats(),
+            "memo": {
+                "entries": len(self._memo),
+                "hits": self.memo_hits,
+                "misses": self.memo_misses,
+                "hit_ratio": self.memo_hits / lookups if lookups else 0.0,
+            },
+        }
+        if self.prefilter is not None:
+            stats["prefilter"] = dict(self.prefilter.stats(), memo_hits=self.memo_hits)
+        return stats
+
+    def set_prefilter(self, prefilter):
+        """设置 (或用 None 取消) HistogramPrefilter，匹配前先排除颜色分布不可能包含模板的画面。"""
+        self.prefilter = prefilter
 
     def set_controls(self, controls_instance):
         """设置Controls实例用于点击操作"""
         self.controls = controls_instance
         print(f"[Vision] Controls实例已设置: {controls_instance}")
 
-    def wait_and_click(self, template_path, timeout=10, confidence=None, interval=0.5):
+    def wait_and_click(self, template_path, timeout=10, confidence=None, interval=None, region=None):
         """
         等待模板出现并点击它。
         """
-        coords = self.wait_for_template(template_path, timeout, confidence, interval)
+        coords = self.wait_for_template(template_path, timeout, confidence, interval, region)
         if coords:
             # 使用controls进行点击
             if hasattr(self, 'controls'):
                 self.controls.click_at(coords[0], coords[1])
+                self.invalidate_frame()
                 return True
             else:
                 print("[Vision] 警告: 未设置Controls实例，无法执行点击操作")
         return False
 
-    def wait_for_image(self, template_path, timeout=10, confidence=None, interval=0.5):
+    def wait_for_image(self, template_path, timeout=10, confidence=None, interval=None, region=None):
         """
         等待图像出现，不执行点击。
         """
-        coords = self.wait_for_template(template_path, timeout, confidence, interval)
+        coords = self.wait_for_template(template_path, timeout, confidence, interval, region)
         return coords is not None
\ No newline at end of file
@@ -0,0 +1,127 @@
+import time
+
+import cv2
+
+try:
+    import pygetwindow  # type: ignore
+except Exception:  # pragma: no cover - 非 Windows 平台或未安装时退回锚点模板
+    pygetwindow = None
+
+
+class GameWindow:
+    """
+    定位游戏窗口，并在窗口移动或缩放时廉价地重新校验。
+    两种定位方式:
+    - 按窗口标题查找 (依赖 pygetwindow，Windows 下随 pyautogui 安装)
+    - 按锚点模板查找: 在整个显示器上匹配一个窗口内固定位置的图标，再由其偏移和窗口尺寸推算窗口区域
+    """
+
+    def __init__(self, title=None, anchor_template=None, anchor_offset=(0, 0), size=None,
+                 crop=(0, 0, 0, 0), revalidate_interval=1.0, confidence=0.8):
+        """
+        :param title: 窗口标题 (包含匹配)
+        :param anchor_template: 锚点模板路径
+        :param anchor_offset: 锚点模板左上角相对窗口左上角的偏移 (x, y)
+        :param size: 锚点模式下的窗口尺寸 (width, height)
+        :param crop: 标题模式下从窗口外框裁掉的边距 (left, top, right, bottom)，用于去掉标题栏和边框
+        :param revalidate_interval: 两次校验之间的最短间隔 (秒)
+        :param confidence: 锚点模板的相似度阈值
+        """
+        self.title = title
+        self.anchor_template = anchor_template
+        self.anchor_offset = tuple(anchor_offset)
+        self.size = tuple(size) if size else None
+        self.crop = tuple(crop)
+        self.revalidate_interval = revalidate_interval
+        self.confidence = confidence
+        self.rect = None # 缓存的窗口区域 (left, top, width, height)，屏幕绝对坐标
+        self._checked_at = 0.0
+        self._anchor = None
+
+    def _load_anchor(self):
+        if self._anchor is None and self.anchor_template:
+            self._anchor = cv2.imread(self.anchor_template, cv2.IMREAD_COLOR)
+            if self._anchor is None:
+                print(f"[Window] 错误: 无法读取锚点模板 {self.anchor_template}")
+        return self._anchor
+
+    def _find_by_title(self):
+        if not self.title or pygetwindow is None:
+            return None
+        try:
+            windows = [w for w in pygetwindow.getWindowsWithTitle(self.title) if not w.isMinimized]
+        except Exception as e:
+            print(f"[Window] 按标题查找窗口失败: {e}")
+            return None
+        if not windows:
+            return None
+        win = windows[0]
+        left, top, right, bottom = self.crop
+        width = win.width - left - right
+        height = win.height - top - bottom
+        if width <= 0 or height <= 0:
+            return None
+        return (win.left + left, win.top + top, width, height)
+
+    def _match_anchor(self, image):
+        anchor = self._load_anchor()
+        if anchor is None or image is None:
+            return None
+        if image.shape[0] < anchor.shape[0] or image.shape[1] < anchor.shape[1]:
+            return None
+        result = cv2.matchTemplate(image, anchor, cv2.TM_CCOEFF_NORMED)
+        _min_val, max_val, _min_loc, max_loc = cv2.minMaxLoc(result)
+        if max_val < self.confidence:
+            return None
+        return max_loc
+
+    def _find_by_anchor(self, screen):
+        if not self.size:
+            return None
+        with screen.unbounded():
+            image = screen.capture()
+            display = screen.monitor
+        loc = self._match_anchor(image)
+        if loc is None:
+            return None
+        left = display['left'] + loc[0] - self.anchor_offset[0]
+        top = display['top'] + loc[1] - self.anchor_offset[1]
+        return (left, top, self.size[0], self.size[1])
+
+    def _anchor_still_there(self, screen):
+        """只截取锚点预期位置附近的小区域确认窗口没有移动。"""
+        anchor = self._load_anchor()
+        if anchor is None or self.rect is None:
+            return False
+        h, w = anchor.shape[:2]
+        x = self.rect[0] + self.anchor_offset[0]
+        y = self.rect[1] + self.anchor_offset[1]
+        with screen.unbounded():
+            image = screen.capture((x - 2, y - 2, w + 4, h + 4), relative=False)
+        return self._match_anchor(image) is not None
+
+    def locate(self, screen):
+        """完整定位一次窗口；找不到时返回 None。"""
+        rect = self._find_by_title()
+        if rect is None and self.anchor_template:
+            rect = self._find_by_anchor(screen)
+        self._checked_at = time.monotonic()
+        if rect is not None:
+            if rect != self.rect:
+                print(f"[Window] 游戏窗口位于 {rect}")
+            self.rect = rect
+        return rect
+
+    def validate(self, screen, force=False):
+        """
+        返回当前窗口区域。间隔未到时直接返回缓存值；
+        标题模式直接查询窗口几何信息，锚点模式先检查锚点原位置，失配时才重新全屏定位。
+        """
+        if not force and self.rect is not None and time.monotonic() - self._checked_at < self.revalidate_interval:
+            return self.rect
+        if self.title and pygetwindow is not None:
+            return self.locate(screen) or self.rect
+        if not force and self._anchor_still_there(screen):
+            self._checked_at = time.monotonic()
+            return self.rect
+        return self.locate(screen) or self.rect
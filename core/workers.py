@@ -0,0 +1,179 @@
+"""
+进程池模板匹配: 模板很多时 (整页商店商品、活动页面) 把匹配分给多个工作进程，绕开 GIL 和 Python 侧开销。
+
+- 主进程把本次要匹配的画面复制进一块 multiprocessing.shared_memory，任务只携带共享内存名和形状
+- 每个工作进程各自映射模板图集 (或读取 PNG) 并缓存模板，按路径匹配分配给它的模板
+- 结果只返回 (相似度, 左上角位置)，与 Vision._match 的返回值相同
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .atlas import TemplateAtlas
+from .vision import convert_image, pyramid_refine
+
+# --- 工作进程内的状态 (由 _init_worker 初始化) ---
+_atlas = None
+_templates = {} # (路径, 缩放, 模式, 层数) -> 模板，层数为 0 时是原尺寸模板
+_block = None # 当前映射的共享内存块
+_derived = {} # (帧编号, 模式, 层数) -> 转换/缩小后的画面，只保留当前帧
+
+
+def _init_worker(atlas_path, template_dir):
+    global _atlas
+    cv2.setNumThreads(1) # 并行来自进程池本身，避免每个进程再开 OpenCV 线程
+    if atlas_path and os.path.exists(atlas_path):
+        try:
+            _atlas = TemplateAtlas(atlas_path, template_dir)
+        except (OSError, ValueError) as e:
+            print(f"[Workers] 警告: 工作进程无法加载模板图集 {atlas_path}: {e}")
+
+
+def _attach(name):
+    """映射主进程发布的共享内存块 (块名变化说明主进程换了更大的块)。"""
+    global _block
+    if _block is None or _block.name != name:
+        if _block is not None:
+            _block.close()
+        _block = shared_memory.SharedMemory(name=name)
+        _derived.clear()
+    return _block
+
+
+def _template(path, scale, mode, levels):
+    key = (path, scale, mode, levels)
+    template = _templates.get(key)
+    if template is None:
+        if levels > 0:
+            if _atlas is not None and scale == 1.0 and mode == "bgr":
+                template = _atlas.get(path, f"pyr{levels}")
+            if template is None:
+                template = _template(path, scale, mode, 0)
+                if template is None:
+                    return None
+                for _ in range(levels):
+                    template = cv2.pyrDown(template)
+        elif mode != "bgr":
+            if _atlas is not None and scale == 1.0 and mode == "gray":
+                template = _atlas.get(path, "gray")
+            if template is None:
+                template = _template(path, scale, "bgr", 0)
+                if template is None:
+                    return None
+                template = convert_image(template, mode)
+        else:
+            if _atlas is not None:
+                template = _atlas.get(path)
+            if template is None:
+                template = cv2.imread(path, cv2.IMREAD_COLOR)
+                if template is None:
+                    return None
+            if scale != 1.0:
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+                template = cv2.resize(template, None, fx=scale, fy=scale, interpolation=interpolation)
+        _templates[key] = template
+    return template
+
+
+def _frame(screen, generation, mode, levels):
+    """当前帧按模式转换、按层数缩小后的画面；换帧时丢弃上一帧的缓存。"""
+    key = (generation, mode, levels)
+    image = _derived.get(key)
+    if image is None:
+        if any(k[0] != generation for k in _derived):
+            _derived.clear()
+        if levels > 0:
+            image = _frame(screen, generation, mode, 0)
+            for _ in range(levels):
+                image = cv2.pyrDown(image)
+        else:
+            image = convert_image(screen, mode)
+        _derived[key] = image
+    return image
+
+
+def _match_job(name, shape, generation, path, scale, confidence, mode, levels, margin, candidates):
+    """工作进程中执行的单个模板匹配，参数与结果都只包含少量标量，序列化开销很小。"""
+    block = _attach(name)
+    raw = np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+    template = _template(path, scale, mode, 0)
+    if template is None or raw.shape[0] < template.shape[0] or raw.shape[1] < template.shape[1]:
+        return -1.0, (0, 0)
+    screen = _frame(raw, generation, mode, 0)
+    template_h, template_w = template.shape[:2]
+    if mode == "edge" or levels <= 0 or min(template_h, template_w) >> levels < 8:
+        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        _min_val, max_val, _min_loc, max_loc = cv2.minMaxLoc(result)
+        return max_val, max_loc
+
+    small_screen = _frame(raw, generation, mode, levels)
+    small_template = _template(path, scale, mode, levels)
+    if small_screen.shape[0] < small_template.shape[0] or small_screen.shape[1] < small_template.shape[1]:
+        return -1.0, (0, 0)
+    coarse = cv2.matchTemplate(small_screen, small_template, cv2.TM_CCOEFF_NORMED)
+    return pyramid_refine(screen, template, coarse, small_template.shape[:2], levels, confidence, margin, candidates)
+
+
+class MatchWorkerPool:
+    """
+    Vision 的可选进程池: 同一画面上要匹配的模板不少于 min_templates 个时，
+    Vision 通过 submit() 把画面发布到共享内存，并为每个模板提交一个任务。
+    同一时间只有一帧在共享内存中: 发布下一帧前先等待上一帧仍在执行的任务结束
+    (优先模式提前命中时 Vision 会取消剩余任务，但已开始执行的任务仍在读取共享内存)。
+    """
+
+    def __init__(self, processes=0, atlas_path="", template_dir="templates", min_templates=4):
+        """
+        :param processes: 工作进程数，0 表示使用全部 CPU 核心
+        :param atlas_path: 工作进程映射的模板图集路径，为空或不存在时读取 PNG
+        :param template_dir: 编译图集时使用的模板目录
+        :param min_templates: 同一画面上待匹配的模板数达到该值时才使用进程池 (模板少时 IPC 开销不划算)
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.min_templates = min_templates
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                             initargs=(atlas_path, template_dir))
+        self._block = None
+        self._generation = 0
+        self._inflight = [] # 上一帧提交的任务
+        print(f"[Workers] 进程池已启动 ({self.processes} 个工作进程)")
+
+    def _publish(self, image):
+        """把画面复制进共享内存；块太小时换一块更大的 (旧块由工作进程在下次任务时解除映射)。"""
+        image = np.ascontiguousarray(image)
+        if self._block is None or self._block.size < image.nbytes:
+            self._release_block()
+            self._block = shared_memory.SharedMemory(create=True, size=image.nbytes)
+        np.ndarray(image.shape, dtype=np.uint8, buffer=self._block.buf)[...] = image
+        self._generation += 1
+        return self._block.name, image.shape, self._generation
+
+    def submit(self, image, jobs, levels=0, margin=0.2, candidates=3):
+        """
+        发布画面并为每个模板提交匹配任务。
+        :param image: 要匹配的画面 (整屏或区域)
+        :param jobs: [(模板路径, 缩放比例, 相似度阈值, 匹配模式), ...]
+        :param levels: 金字塔层数 (含义同 Vision.pyramid_levels)
+        :return: 与 jobs 顺序相同的 Future 列表，结果为 (最高相似度, 左上角位置)
+        """
+        wait(self._inflight) # 已取消的任务立即完成，只需等待已开始执行的任务
+        name, shape, generation = self._publish(image)
+        self._inflight = [self._executor.submit(_match_job, name, shape, generation, path, scale, confidence, mode,
+                                                levels, margin, candidates)
+                          for path, scale, confidence, mode in jobs]
+        return list(self._inflight)
+
+    def _release_block(self):
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def close(self):
+        """停止工作进程并释放共享内存。"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._release_block()
@@ -1,7 +1,18 @@
+import os
 import sys
-from core.screen import Screen
+from core.screen import Screen, CaptureService
 from core.controls import Controls
 from core.vision import Vision
+from core.window import GameWindow
+from core.backends import create_backend
+from core.recorder import FlightRecorder
+from core.hints import LocationHints
+from core.atlas import TemplateAtlas
+from core.registry import TemplateRegistry
+from core.calibration import ScaleCalibrator
+from core.poller import AdaptivePoller
+from core.workers import MatchWorkerPool
+from core.prefilter import HistogramPrefilter
 from tasks.test_task import TestTask
 from tasks.login_task import LoginTask
 from tasks.shop_task import ShopTask
@@ -28,12 +39,44 @@ class DoroBot:
         self.config_manager.save()
         # 1. 初始化所有核心组件 (机器人的“四肢”)
         try:
-            self.screen = Screen()
-            self.controls = Controls()
-            default_conf = (
-                self.config.get('vision', {}).get('default_confidence', 0.8)
+            screen_opts = self.config.get('screen', {})
+            self.screen = Screen(
+                screen_opts.get('monitor', 1),
+                reuse_buffers=bool(screen_opts.get('reuse_buffers', True)),
+                backend=self._create_backend(screen_opts),
+                display_check_interval=screen_opts.get('display_check_interval', 10.0),
             )
-            self.vision = Vision(self.screen, default_conf)
+            self._attach_game_window(screen_opts)
+            self.controls = Controls(self.screen)
+            vision_opts = self.config.get('vision', {})
+            memo_opts = vision_opts.get('memo', {}) or {}
+            default_conf = vision_opts.get('default_confidence', 0.8)
+            poller = AdaptivePoller()
+            self._apply_polling(poller, vision_opts.get('polling', {}) or {})
+            self.controls.poller = poller
+            self.vision = Vision(
+                self.screen,
+                default_conf,
+                frame_cache_ttl=vision_opts.get('frame_cache_ttl', 0.1),
+                pyramid_levels=vision_opts.get('pyramid_levels', 0),
+                template_cache_bytes=int(vision_opts.get('template_cache_mb', 64) * 1024 * 1024),
+                template_miss_ttl=vision_opts.get('template_miss_ttl', 5.0),
+                poller=poller,
+                match_threads=vision_opts.get('match_threads', 0),
+                default_mode=vision_opts.get('default_mode', 'bgr'),
+                mode_confidence=vision_opts.get('mode_confidence', {}),
+                memo_entries=memo_opts.get('max_entries', 256) if memo_opts.get('enabled', True) else 0,
+                memo_row_stride=memo_opts.get('row_stride', 4),
+            )
+            self._load_atlas(vision_opts.get('template_atlas', ''))
+            self.templates = self._load_templates()
+            self.calibrator = self._calibrate_scale(vision_opts.get('calibration', {}) or {})
+            self.hints = self._create_hints(vision_opts.get('location_hints', {}) or {})
+            self.prefilter = self._create_prefilter(vision_opts.get('prefilter', {}) or {})
+            self.workers = self._create_workers(vision_opts.get('workers', {}) or {},
+                                                vision_opts.get('template_atlas', ''))
+            self.capture_service = self._start_capture_service(screen_opts)
+            self.recorder = self._create_recorder(self.config.get('recorder', {}))
         except Exception as e:
             print(f"初始化核心组件失败: {e}")
             print("机器人无法启动。")
@@ -66,13 +109,164 @@ class DoroBot:
         }
         print("--- DoroBot 初始化完成 ---")
 
+    def _create_backend(self, screen_opts):
+        """按配置创建截图后端: mss (实时截图)、xshm (X11 共享内存截图) 或 replay (回放录制的画面)。"""
+        name = screen_opts.get('backend', 'mss') or 'mss'
+        options = screen_opts.get(name, {}) if name != 'mss' else {}
+        return create_backend(name, **(options or {}))
+
+    def _attach_game_window(self, screen_opts):
+        """按配置定位游戏窗口，之后截图和点击坐标都以窗口为基准 (默认关闭)。"""
+        window_opts = screen_opts.get('window', {}) or {}
+        if not window_opts.get('enabled', False):
+            return
+        window = GameWindow(
+            title=window_opts.get('title') or None,
+            anchor_template=window_opts.get('anchor_template') or None,
+            anchor_offset=window_opts.get('anchor_offset', (0, 0)),
+            size=window_opts.get('size') or None,
+            crop=window_opts.get('crop', (0, 0, 0, 0)),
+            revalidate_interval=window_opts.get('revalidate_interval', 1.0),
+        )
+        if not self.screen.attach_window(window):
+            print("[Screen] 警告: 未找到游戏窗口，暂时截取整个显示器")
+
+    def _start_capture_service(self, screen_opts):
+        """按配置启动后台截图线程 (默认关闭)，并交给 Vision 使用。"""
+        thread_opts = screen_opts.get('capture_thread', {}) or {}
+        if not thread_opts.get('enabled', False):
+            return None
+        monitor = screen_opts.get('monitor', 1)
+        service = CaptureService(
+            monitor,
+            fps=thread_opts.get('fps', 10),
+            ring_size=thread_opts.get('ring_size', 4),
+            screen_factory=lambda: Screen(monitor, backend=self._create_backend(screen_opts)),
+        )
+        # 后台截图跟随游戏窗口的截图范围
+        service.set_bounds(self.screen.monitor)
+        self.screen.add_bounds_listener(service.set_bounds)
+        service.start()
+        self.vision.set_capture_service(service, thread_opts.get('max_age_ms', 200))
+        return service
+
+    @staticmethod
+    def _apply_polling(poller, polling_opts):
+        """把 vision.polling 配置应用到轮询器 (启动和热更新时调用)。"""
+        poller.min_interval = polling_opts.get('min_interval', 0.05)
+        poller.max_interval = polling_opts.get('max_interval', 0.5)
+        poller.backoff = polling_opts.get('backoff', 1.5)
+        poller.change_threshold = polling_opts.get('change_threshold', 12)
+        poller.max_idle = polling_opts.get('max_idle', 2.0)
+
+    def _load_atlas(self, atlas_path):
+        """映射预编译的模板图集 (python -m core.atlas 生成)；文件不存在时逐个读取 PNG。"""
+        if not atlas_path or not os.path.exists(atlas_path):
+            return
+        try:
+            self.vision.set_atlas(TemplateAtlas(atlas_path))
+        except (OSError, ValueError) as e:
+            print(f"[Atlas] 警告: 无法加载模板图集 {atlas_path}: {e}")
+
+    def _load_templates(self):
+        """读取模板清单并检查缺失的模板文件，任务因此可以在启动时就知道哪些步骤无法执行。"""
+        registry = TemplateRegistry()
+        self.vision.set_registry(registry)
+        missing = registry.validate(self.vision.atlas)
+        for group, names in missing.items():
+            print(f"[Templates] 警告: 分组 '{group}' 缺少 {len(names)} 个模板: {', '.join(names)}")
+        return registry
+
+    def _calibrate_scale(self, calibration_opts):
+        """按锚点模板校准模板缩放比例 (默认关闭)；截图范围尺寸变化时自动重新校准。"""
+        anchor = calibration_opts.get('anchor_template')
+        if not calibration_opts.get('enabled', False) or not anchor:
+            return None
+        calibrator = ScaleCalibrator(
+            self.vision,
+            anchor,
+            min_scale=calibration_opts.get('min_scale', 0.5),
+            max_scale=calibration_opts.get('max_scale', 2.0),
+            step=calibration_opts.get('step', 0.05),
+            confidence=calibration_opts.get('confidence', 0.8),
+            cache_path=calibration_opts.get('cache_path', 'data/scale_calibration.json'),
+        )
+        calibrator.calibrate()
+        return calibrator
+
+    def _create_hints(self, hints_opts):
+        """按配置加载模板位置提示，整屏查找时优先搜索模板上次出现的位置。"""
+        if not hints_opts.get('enabled', True):
+            return None
+        hints = LocationHints(
+            path=hints_opts.get('path', 'data/template_hints.json'),
+            padding=hints_opts.get('padding', 32),
+            max_spots=hints_opts.get('max_spots', 3),
+        )
+        self.vision.set_hints(hints)
+        return hints
+
+    def _create_prefilter(self, prefilter_opts):
+        """按配置启用颜色直方图预筛选 (默认关闭)，颜色分布不可能包含模板时跳过匹配。"""
+        if not prefilter_opts.get('enabled', False):
+            return None
+        prefilter = HistogramPrefilter(
+            bins=prefilter_opts.get('bins', 4),
+            min_coverage=prefilter_opts.get('min_coverage', 0.8),
+        )
+        self.vision.set_prefilter(prefilter)
+        return prefilter
+
+    def _create_workers(self, workers_opts, atlas_path):
+        """按配置启动匹配进程池 (默认关闭)；工作进程各自映射模板图集。"""
+        if not workers_opts.get('enabled', False):
+            return None
+        workers = MatchWorkerPool(
+            processes=workers_opts.get('processes', 0),
+            atlas_path=atlas_path,
+            min_templates=workers_opts.get('min_templates', 4),
+        )
+        self.vision.set_workers(workers)
+        return workers
+
+    def _create_recorder(self, recorder_opts):
+        """按配置创建 FlightRecorder 并挂到 Vision/Controls 上 (任务失败时保存现场)。"""
+        if not recorder_opts.get('enabled', True):
+            return None
+        recorder = FlightRecorder(
+            capacity=recorder_opts.get('capacity', 60),
+            scale=recorder_opts.get('scale', 0.25),
+            min_frame_interval=recorder_opts.get('min_frame_interval', 0.5),
+            output_dir=recorder_opts.get('output_dir', 'logs/flight'),
+        )
+        self.vision.set_recorder(recorder)
+        self.controls.set_recorder(recorder)
+        return recorder
+
     def _on_config_file_changed(self):
         """配置文件变更回调：重新加载并更新运行时组件和任务引用"""
         try:
             self.config_manager.load()
             self.config = self.config_manager.data
-            new_conf = self.config.get('vision', {}).get('default_confidence', 0.8)
-            self.vision.default_confidence = new_conf
+            vision_opts = self.config.get('vision', {})
+            self.vision.default_confidence = vision_opts.get('default_confidence', 0.8)
+            self.vision.frame_cache_ttl = vision_opts.get('frame_cache_ttl', 0.1)
+            self.vision.pyramid_levels = vision_opts.get('pyramid_levels', 0)
+            self.vision.template_cache.max_bytes = int(vision_opts.get('template_cache_mb', 64) * 1024 * 1024)
+            self.vision.template_cache.miss_ttl = vision_opts.get('template_miss_ttl', 5.0)
+            self._apply_polling(self.vision.poller, vision_opts.get('polling', {}) or {})
+            self.vision.set_match_threads(vision_opts.get('match_threads', 0))
+            self.vision.default_mode = vision_opts.get('default_mode', 'bgr')
+            self.vision.mode_confidence = dict(vision_opts.get('mode_confidence', {}) or {})
+            memo_opts = vision_opts.get('memo', {}) or {}
+            self.vision.memo_entries = memo_opts.get('max_entries', 256) if memo_opts.get('enabled', True) else 0
+            self.vision.memo_row_stride = memo_opts.get('row_stride', 4)
+            screen_opts = self.config.get('screen', {}) or {}
+            self.screen.display_check_interval = screen_opts.get('display_check_interval', 10.0)
+            if self.vision.prefilter is not None:
+                prefilter_opts = vision_opts.get('prefilter', {}) or {}
+                self.vision.prefilter.bins = prefilter_opts.get('bins', 4)
+                self.vision.prefilter.min_coverage = prefilter_opts.get('min_coverage', 0.8)
             for task in self.available_tasks.values():
                 try:
                     task.config = self.config
@@ -88,6 +282,7 @@ class DoroBot:
             task_settings = self.config.get('tasks', {})
             runner_opts = self.config.get('task_runner', {})
             break_on_failure = bool(runner_opts.get('break_on_failure', False))
+            skip_missing = bool(runner_opts.get('skip_missing_templates', True))
 
             for task_name, is_enabled in task_settings.items():
                 if not is_enabled:
@@ -101,18 +296,31 @@ class DoroBot:
                         break
                     continue
 
+                task = self.available_tasks[task_name]
+                if skip_missing and self.templates.all_missing(task.template_group):
+                    # 模板全部缺失时任务只会在每个等待上耗尽超时，直接判定失败
+                    print(f"[TaskRunner] === 任务失败: {task_name} (模板分组 '{task.template_group}' 的模板全部缺失) ===")
+                    if break_on_failure:
+                        print("[TaskRunner] 失败触发中断，停止后续任务。")
+                        break
+                    continue
+
                 print(f"\n[TaskRunner] === 正在执行任务: {task_name} ===")
                 ok = False
                 try:
-                    ok = bool(self.available_tasks[task_name].run())
+                    ok = bool(task.run())
                 except Exception as e:
                     print(f"[TaskRunner] 任务异常: {task_name}: {e}")
                     ok = False
+                    if self.recorder:
+                        self.recorder.record_action("exception", task=task_name, error=repr(e))
 
                 if ok:
                     print(f"[TaskRunner] === 任务成功: {task_name} ===")
                 else:
                     print(f"[TaskRunner] === 任务失败: {task_name} ===")
+                    if self.recorder:
+                        self.recorder.dump(task_name)
                     if break_on_failure:
                         print("[TaskRunner] 失败触发中断，停止后续任务。")
                         break
@@ -131,6 +339,45 @@ class DoroBot:
                     self._config_watcher.stop()
             except Exception:
                 pass
+            try:
+                if getattr(self, "capture_service", None):
+                    self.capture_service.stop()
+            except Exception:
+                pass
+            try:
+                if getattr(self, "vision", None):
+                    vision_stats = self.vision.stats()
+                    stats = vision_stats['template_cache']
+                    print(f"[Vision] 模板缓存: {stats['entries']} 项 / {stats['resident_bytes'] / 1024 / 1024:.1f} MB，"
+                          f"命中 {stats['hits']}，未命中 {stats['misses']}，"
+                          f"缺失模板命中 {stats['negative_hits']}，淘汰 {stats['evictions']}")
+                    stats = vision_stats['memo']
+                    print(f"[Vision] 匹配结果记忆: 命中 {stats['hits']}，未命中 {stats['misses']} "
+                          f"({stats['hit_ratio']:.0%})")
+                    if 'prefilter' in vision_stats:
+                        stats = vision_stats['prefilter']
+                        print(f"[Vision] 颜色预筛选: 检查 {stats['checks']} 次，跳过匹配 {stats['skips']} 次 "
+                              f"({stats['skip_ratio']:.0%})，另有 {stats['memo_hits']} 次由匹配结果记忆返回、未经预筛选")
+                    self.vision.close()
+            except Exception:
+                pass
+            try:
+                if getattr(self, "workers", None):
+                    self.workers.close()
+            except Exception:
+                pass
+            try:
+                if getattr(self, "hints", None):
+                    print(self.hints.report())
+                    self.hints.close()
+            except Exception:
+                pass
+            try:
+                if getattr(self, "recorder", None):
+                    # 等待尚未写完的现场记录
+                    self.recorder.close()
+            except Exception:
+                pass
             print("[DoroBot] 正在关闭...")
 
 # --- Python 脚本的主入口点 ---
@@ -12,23 +12,15 @@ from tasks.basic_task import Task
 
 class ArenaTask(Task):
     """竞技场任务类"""
+    template_group = "arena"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 竞技场图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.arena_images = {
-            "arena_tab": f"{self.game_images_path}arena_tab.png",
-            "battle_button": f"{self.game_images_path}battle_button.png",
-            "victory": f"{self.game_images_path}victory.png",
-            "defeat": f"{self.game_images_path}defeat.png",
-            "arena_rookie": f"{self.game_images_path}arena_rookie.png",
-            "arena_award": f"{self.game_images_path}arena_award.png",
-            "arena_confirm": f"{self.game_images_path}arena_confirm.png"
-        }
+        # 竞技场图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.arena_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -102,13 +94,13 @@ class ArenaTask(Task):
                     if not self.bot.is_running:
                         break
                     
-                    # 检查胜利或失败
-                    if self.vision.wait_for_image(self.arena_images["victory"], timeout=1):
-                        logging.getLogger(__name__).info("战斗胜利")
-                        result_found = True
-                        break
-                    elif self.vision.wait_for_image(self.arena_images["defeat"], timeout=1):
-                        logging.getLogger(__name__).info("战斗失败")
+                    # 检查胜利或失败 (同一帧截图上匹配两个模板)
+                    match = self.vision.find_any([self.arena_images["victory"], self.arena_images["defeat"]])
+                    if match:
+                        if match.template == self.arena_images["victory"]:
+                            logging.getLogger(__name__).info("战斗胜利")
+                        else:
+                            logging.getLogger(__name__).info("战斗失败")
                         result_found = True
                         break
                     
@@ -1,13 +1,17 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import time
 import random
+from core.registry import TemplateRegistry
 
 class Task:
     """
     所有任务模块的基类。
     提供与 AHK 脚本常用流程对齐的通用辅助方法。
     """
+    # 任务在 templates/manifest.yaml 中的模板分组，DoroBot 据此在启动时检查模板是否齐全
+    template_group: Optional[str] = None
+
     def __init__(self, bot_instance: Any) -> None:
         """
         初始化任务。
@@ -22,6 +26,16 @@ class Task:
         """子类必须实现的任务入口，返回任务是否成功。"""
         raise NotImplementedError("你必须在子类中实现 run() 方法")
 
+    def template_paths(self, group: Optional[str] = None) -> Dict[str, str]:
+        """
+        返回模板分组中 逻辑名 -> 模板路径 的字典。
+        :param group: 分组名，缺省为任务自己的 template_group
+        """
+        registry = getattr(self.bot, "templates", None)
+        if registry is None:
+            registry = TemplateRegistry()
+        return registry.group(group or self.template_group)
+
     def random_delay(self, min_seconds: float = 0.5, max_seconds: float = 2.0) -> float:
         """
         随机延迟，模拟人类行为。
@@ -50,6 +64,24 @@ class Task:
             return True
         return False
 
+    def find_any_and_click(self, image_paths: List[str], fallback_coords: Optional[Tuple[int, int]] = None,
+                           timeout: int = 10) -> bool:
+        """
+        等待多个模板中的任意一个 (每轮只截图一次，排在前面的优先) 并点击它；都找不到时可回退点击备用坐标。
+        :param image_paths: 模板路径列表
+        :param fallback_coords: 备用坐标 (x, y)
+        :param timeout: 超时时间秒
+        :return: 是否执行了点击
+        """
+        match = self.vision.wait_for_any(image_paths, timeout=timeout)
+        if match:
+            self.controls.user_click(int(match.coords[0]), int(match.coords[1]))
+            return True
+        if fallback_coords is not None:
+            self.controls.user_click(fallback_coords[0], fallback_coords[1])
+            return True
+        return False
+
     def press_escape(self) -> None:
         """
         模拟按下 Esc，与 AHK 的 GoBack 中的 Send "{Esc}" 对齐。
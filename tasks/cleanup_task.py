@@ -12,24 +12,15 @@ from tasks.basic_task import Task
 
 class CleanupTask(Task):
     """任务清理类"""
+    template_group = "cleanup"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 清理任务图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.cleanup_images = {
-            "upgrade_loop_room": f"{self.game_images_path}upgrade_loop_room.png",
-            "synchronizer": f"{self.game_images_path}synchronizer.png",
-            "nikke_enhancement": f"{self.game_images_path}nikke_enhancement.png",
-            "equipment_enhancement": f"{self.game_images_path}equipment_enhancement.png",
-            "skill_enhancement": f"{self.game_images_path}skill_enhancement.png",
-            "bond_level": f"{self.game_images_path}bond_level.png",
-            "cleanup_confirm": f"{self.game_images_path}cleanup_confirm.png",
-            "cleanup_complete": f"{self.game_images_path}cleanup_complete.png"
-        }
+        # 清理任务图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.cleanup_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -39,8 +30,7 @@ class CleanupTask(Task):
             "equipment_click": (620, 300),
             "skill_click": (370, 340),
             "bond_click": (470, 380),
-            "confirm_click": (720, 520),
-            "complete_click": (670, 470)
+            "confirm_click": (720, 520)
         }
     
     def run(self) -> bool:
@@ -103,13 +93,9 @@ class CleanupTask(Task):
     
     def _confirm_cleanup(self):
         """确认清理操作"""
-        # 检查是否需要确认清理
-        if self.find_and_click(self.cleanup_images["cleanup_confirm"], self.coordinates["confirm_click"], timeout=3):
-            self.random_delay(1, 2)
-            return True
-        
-        # 检查是否有完成按钮
-        if self.find_and_click(self.cleanup_images["cleanup_complete"], self.coordinates["complete_click"], timeout=3):
+        # 检查是否需要确认，或已有完成按钮 (同一帧上匹配两个模板)
+        if self.find_any_and_click([self.cleanup_images["cleanup_confirm"], self.cleanup_images["cleanup_complete"]],
+                                   self.coordinates["confirm_click"], timeout=3):
             self.random_delay(1, 2)
             return True
         
@@ -12,22 +12,15 @@ from tasks.basic_task import Task
 
 class EventTask(Task):
     """活动参与任务类"""
+    template_group = "event"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 活动任务图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.event_images = {
-            "event_small": f"{self.game_images_path}event_small.png",
-            "event_large": f"{self.game_images_path}event_large.png",
-            "event_special": f"{self.game_images_path}event_special.png",
-            "event_enter": f"{self.game_images_path}event_enter.png",
-            "event_confirm": f"{self.game_images_path}event_confirm.png",
-            "event_complete": f"{self.game_images_path}event_complete.png"
-        }
+        # 活动任务图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.event_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -35,8 +28,7 @@ class EventTask(Task):
             "large_event_click": (420, 240),
             "special_event_click": (520, 280),
             "enter_click": (620, 320),
-            "confirm_click": (720, 520),
-            "complete_click": (670, 470)
+            "confirm_click": (720, 520)
         }
     
     def run(self) -> bool:
@@ -83,13 +75,9 @@ class EventTask(Task):
     
     def _confirm_event_participation(self):
         """确认活动参与操作"""
-        # 检查是否需要确认参与
-        if self.find_and_click(self.event_images["event_confirm"], self.coordinates["confirm_click"], timeout=3):
-            self.random_delay(1, 2)
-            return True
-        
-        # 检查是否有完成按钮
-        if self.find_and_click(self.event_images["event_complete"], self.coordinates["complete_click"], timeout=3):
+        # 检查是否需要确认，或已有完成按钮 (同一帧上匹配两个模板)
+        if self.find_any_and_click([self.event_images["event_confirm"], self.event_images["event_complete"]],
+                                   self.coordinates["confirm_click"], timeout=3):
             self.random_delay(1, 2)
             return True
         
@@ -12,22 +12,15 @@ from tasks.basic_task import Task
 
 class InterceptionTask(Task):
     """拦截战任务类"""
+    template_group = "interception"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 拦截战任务图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.interception_images = {
-            "interception_normal": f"{self.game_images_path}interception_normal.png",
-            "interception_abnormal": f"{self.game_images_path}interception_abnormal.png",
-            "interception_enter": f"{self.game_images_path}interception_enter.png",
-            "interception_confirm": f"{self.game_images_path}interception_confirm.png",
-            "interception_complete": f"{self.game_images_path}interception_complete.png",
-            "interception_fight": f"{self.game_images_path}interception_fight.png"
-        }
+        # 拦截战任务图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.interception_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -35,7 +28,6 @@ class InterceptionTask(Task):
             "abnormal_click": (420, 240),
             "enter_click": (620, 320),
             "confirm_click": (720, 520),
-            "complete_click": (670, 470),
             "fight_click": (580, 380)
         }
     
@@ -79,13 +71,9 @@ class InterceptionTask(Task):
     
     def _confirm_interception_completion(self):
         """确认拦截战完成操作"""
-        # 检查是否需要确认完成
-        if self.find_and_click(self.interception_images["interception_confirm"], self.coordinates["confirm_click"], timeout=3):
-            self.random_delay(1, 2)
-            return True
-        
-        # 检查是否有完成按钮
-        if self.find_and_click(self.interception_images["interception_complete"], self.coordinates["complete_click"], timeout=3):
+        # 检查是否需要确认，或已有完成按钮 (同一帧上匹配两个模板)
+        if self.find_any_and_click([self.interception_images["interception_confirm"], self.interception_images["interception_complete"]],
+                                   self.coordinates["confirm_click"], timeout=3):
             self.random_delay(1, 2)
             return True
         
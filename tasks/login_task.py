@@ -13,22 +13,15 @@ from tasks.basic_task import Task
 
 class LoginTask(Task):
     """登录任务类"""
+    template_group = "login"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 游戏特定图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.login_images = {
-            "start_button": f"{self.game_images_path}start_button.png",
-            "login_button": f"{self.game_images_path}login_button.png",
-            "main_menu": f"{self.game_images_path}main_menu.png",
-            "sign_reward": f"{self.game_images_path}sign_reward.png",
-            "server_confirm": f"{self.game_images_path}server_confirm.png",
-            "download_content": f"{self.game_images_path}download_content.png"
-        }
+        # 游戏特定图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.login_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -12,24 +12,15 @@ from tasks.basic_task import Task
 
 class RewardTask(Task):
     """奖励收集任务类"""
+    template_group = "reward"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 奖励收集图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.reward_images = {
-            "outpost_reward": f"{self.game_images_path}outpost_reward.png",
-            "mail_reward": f"{self.game_images_path}mail_reward.png",
-            "daily_reward": f"{self.game_images_path}daily_reward.png",
-            "weekly_reward": f"{self.game_images_path}weekly_reward.png",
-            "friendship_reward": f"{self.game_images_path}friendship_reward.png",
-            "manufacture_reward": f"{self.game_images_path}manufacture_reward.png",
-            "reward_confirm": f"{self.game_images_path}reward_confirm.png",
-            "reward_collect": f"{self.game_images_path}reward_collect.png"
-        }
+        # 奖励收集图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.reward_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -39,8 +30,7 @@ class RewardTask(Task):
             "weekly_click": (600, 300),
             "friendship_click": (350, 350),
             "manufacture_click": (450, 400),
-            "confirm_click": (700, 500),
-            "collect_click": (650, 450)
+            "confirm_click": (700, 500)
         }
     
     def run(self) -> bool:
@@ -103,13 +93,9 @@ class RewardTask(Task):
     
     def _confirm_collection(self):
         """确认奖励收集操作"""
-        # 检查是否需要确认收集
-        if self.find_and_click(self.reward_images["reward_confirm"], self.coordinates["confirm_click"], timeout=3):
-            self.random_delay(1, 2)
-            return True
-        
-        # 检查是否有收集按钮
-        if self.find_and_click(self.reward_images["reward_collect"], self.coordinates["collect_click"], timeout=3):
+        # 检查是否需要确认，或已有收集按钮 (同一帧上匹配两个模板)
+        if self.find_any_and_click([self.reward_images["reward_confirm"], self.reward_images["reward_collect"]],
+                                   self.coordinates["confirm_click"], timeout=3):
             self.random_delay(1, 2)
             return True
         
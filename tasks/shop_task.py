@@ -12,26 +12,15 @@ from tasks.basic_task import Task
 
 class ShopTask(Task):
     """商店购买任务类"""
+    template_group = "shop"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 商店图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.shop_images = {
-            "shop_tab": f"{self.game_images_path}shop_tab.png",
-            "cash_shop": f"{self.game_images_path}cash_shop.png",
-            "general_shop": f"{self.game_images_path}general_shop.png",
-            "arena_shop": f"{self.game_images_path}arena_shop.png",
-            "recycle_shop": f"{self.game_images_path}recycle_shop.png",
-            "buy_button": f"{self.game_images_path}buy_button.png",
-            "confirm_button": f"{self.game_images_path}confirm_button.png",
-            "purchase_button": f"{self.game_images_path}purchase_button.png",
-            "shop_confirm": f"{self.game_images_path}shop_confirm.png",
-            "shop_complete": f"{self.game_images_path}shop_complete.png"
-        }
+        # 商店图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.shop_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -171,19 +160,13 @@ class ShopTask(Task):
     
     def _confirm_purchase_completion(self):
         """确认购买完成操作"""
-        # 检查是否需要确认购买
-        coords = self.vision.wait_for_template(self.shop_images["shop_confirm"], timeout=3)
-        if coords:
-            # 点击确认
-            self.controls.user_click(self.coordinates["shop_confirm"][0], self.coordinates["shop_confirm"][1])
-            self.random_delay(1, 2)
-            return True
-        
-        # 检查是否有完成按钮
-        coords = self.vision.wait_for_template(self.shop_images["shop_complete"], timeout=3)
-        if coords:
-            # 点击完成
-            self.controls.user_click(self.coordinates["shop_complete"][0], self.coordinates["shop_complete"][1])
+        # 检查是否需要确认购买或已有完成按钮 (每轮只截图一次，同时匹配两个模板)
+        match = self.vision.wait_for_any(
+            [self.shop_images["shop_confirm"], self.shop_images["shop_complete"]], timeout=3)
+        if match:
+            # 点击确认或完成
+            key = "shop_confirm" if match.template == self.shop_images["shop_confirm"] else "shop_complete"
+            self.controls.user_click(self.coordinates[key][0], self.coordinates[key][1])
             self.random_delay(1, 2)
             return True
         
@@ -202,15 +185,20 @@ class ShopTask(Task):
         """购买特定商店类型的物品"""
         logging.getLogger(__name__).info(f"购买{shop_type}商店物品")
         
-        # 模拟点击购买按钮
-        for i in range(5):  # 模拟购买5个物品
+        # 一次截图找出所有购买按钮 (最多购买5个物品)，按从上到下、从左到右的顺序点击
+        if not self.vision.wait_for_image(self.shop_images["buy_button"], timeout=3):
+            return
+        # 取出全部按钮再按位置排序后截取前5个 (max_results 保留的是相似度最高的5个，不一定是最前面的5个)
+        buttons = self.vision.find_all_templates(self.shop_images["buy_button"])
+        for button in sorted(buttons, key=lambda m: (m.bbox[1], m.bbox[0]))[:5]:
             if not self.bot.is_running:
                 break
             
-            if self.vision.wait_and_click(self.shop_images["buy_button"], timeout=3):
+            self.controls.user_click(int(button.coords[0]), int(button.coords[1]))
+            self.vision.invalidate_frame()
+            self.random_delay(0.5, 1)
+            if self.vision.wait_and_click(self.shop_images["confirm_button"], timeout=3):
                 self.random_delay(0.5, 1)
-                if self.vision.wait_and_click(self.shop_images["confirm_button"], timeout=3):
-                    self.random_delay(0.5, 1)
     
  
 # 测试代码
@@ -12,23 +12,15 @@ from tasks.basic_task import Task
 
 class SimulationTask(Task):
     """模拟室任务类"""
+    template_group = "simulation"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 模拟室任务图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.simulation_images = {
-            "simulation_room": f"{self.game_images_path}simulation_room.png",
-            "simulation_normal": f"{self.game_images_path}simulation_normal.png",
-            "simulation_overclock": f"{self.game_images_path}simulation_overclock.png",
-            "simulation_enter": f"{self.game_images_path}simulation_enter.png",
-            "simulation_confirm": f"{self.game_images_path}simulation_confirm.png",
-            "simulation_complete": f"{self.game_images_path}simulation_complete.png",
-            "simulation_start": f"{self.game_images_path}simulation_start.png"
-        }
+        # 模拟室任务图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.simulation_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -37,7 +29,6 @@ class SimulationTask(Task):
             "overclock_click": (420, 260),
             "enter_click": (620, 340),
             "confirm_click": (720, 540),
-            "complete_click": (670, 490),
             "start_click": (580, 400)
         }
     
@@ -91,13 +82,9 @@ class SimulationTask(Task):
     
     def _confirm_simulation_completion(self):
         """确认模拟完成操作"""
-        # 检查是否需要确认完成
-        if self.find_and_click(self.simulation_images["simulation_confirm"], self.coordinates["confirm_click"], timeout=3):
-            self.random_delay(1, 2)
-            return True
-        
-        # 检查是否有完成按钮
-        if self.find_and_click(self.simulation_images["simulation_complete"], self.coordinates["complete_click"], timeout=3):
+        # 检查是否需要确认，或已有完成按钮 (同一帧上匹配两个模板)
+        if self.find_any_and_click([self.simulation_images["simulation_confirm"], self.simulation_images["simulation_complete"]],
+                                   self.coordinates["confirm_click"], timeout=3):
             self.random_delay(1, 2)
             return True
         
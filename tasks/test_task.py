@@ -5,12 +5,14 @@ class TestTask(Task):
     """
     一个演示任务：查找一个图标并移动鼠标过去。
     """
+    template_group = "test"
+
     def __init__(self, bot_instance):
         # 必须调用父类的 __init__ 来设置 self.bot, self.vision 等
         super().__init__(bot_instance)
         
         # 从配置中获取特定于此任务的设置
-        self.icon_to_find = 'templates/test_icon.png'
+        self.icon_to_find = self.template_paths()["test_icon"]
         self.confidence = self.config['vision']['default_confidence']
         self.timeout = self.config['vision']['default_timeout']
 
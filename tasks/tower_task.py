@@ -12,23 +12,15 @@ from tasks.basic_task import Task
 
 class TowerTask(Task):
     """无限之塔任务类"""
+    template_group = "tower"
     
     def __init__(self, bot, settings: Dict[str, Any], numeric_settings: Dict[str, Any]):
         super().__init__(bot)
         self.settings = settings
         self.numeric_settings = numeric_settings
         
-        # 无限之塔图片路径，匹配AHK脚本中的图像资源
-        self.game_images_path = "templates/"
-        self.tower_images = {
-            "tower_tab": f"{self.game_images_path}tower_tab.png",
-            "company_tower": f"{self.game_images_path}company_tower.png",
-            "universal_tower": f"{self.game_images_path}universal_tower.png",
-            "challenge_button": f"{self.game_images_path}challenge_button.png",
-            "confirm_button": f"{self.game_images_path}confirm_button.png",
-            "tower_complete": f"{self.game_images_path}tower_complete.png",
-            "tower_retry": f"{self.game_images_path}tower_retry.png"
-        }
+        # 无限之塔图片路径 (逻辑名 -> 路径，定义在 templates/manifest.yaml)
+        self.tower_images = self.template_paths()
         
         # 坐标设置，类似AHK脚本中的坐标定义
         self.coordinates = {
@@ -158,17 +150,15 @@ class TowerTask(Task):
         # 等待一段时间让挑战完成
         time.sleep(10)
         
-        # 检查是否有完成按钮
-        coords = self.vision.wait_for_template(self.tower_images["tower_complete"], timeout=5)
-        if coords:
+        # 检查是否有完成或重试按钮 (同一帧上匹配两个模板，完成优先)
+        match = self.vision.wait_for_any(
+            [self.tower_images["tower_complete"], self.tower_images["tower_retry"]], timeout=5)
+        if match and match.template == self.tower_images["tower_complete"]:
             # 点击完成
             self.controls.user_click(self.coordinates["tower_complete"][0], self.coordinates["tower_complete"][1])
             self.random_delay(1, 2)
             return True
-        
-        # 检查是否需要重试
-        coords = self.vision.wait_for_template(self.tower_images["tower_retry"], timeout=3)
-        if coords:
+        if match:
             # 点击重试
             self.controls.user_click(self.coordinates["tower_retry"][0], self.coordinates["tower_retry"][1])
             self.random_delay(1, 2)